@@ -0,0 +1,190 @@
+import json
+import os
+import re
+import subprocess
+
+from Metricas import span
+
+
+# Límite de tamaño por archivo de la API de transcripción de OpenAI
+LIMITE_BYTES_API = 25 * 1024 * 1024
+
+# Perfiles de codificación para los segmentos que se suben a transcribir.
+# "transcripcion" es mono a 16 kHz en Opus: suficiente para voz y unas 8 veces más pequeño que un MP3 a 192 kbps.
+PERFILES_AUDIO = {
+    "transcripcion": {
+        "extension": ".ogg",
+        "bitrate_kbps": 24,
+        "argumentos": ["-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", "24k", "-application", "voip"],
+    },
+    "mp3": {
+        "extension": ".mp3",
+        "bitrate_kbps": 48,
+        "argumentos": ["-ac", "1", "-ar", "16000", "-c:a", "libmp3lame", "-b:a", "48k"],
+    },
+    # Copia el audio tal cual, sin recodificar (el tamaño depende del archivo original)
+    "copia": {
+        "extension": None,
+        "bitrate_kbps": None,
+        "argumentos": ["-c:a", "copy"],
+    },
+}
+
+# Parámetros para buscar silencios cerca de los puntos de corte
+VENTANA_SILENCIO_S = 20
+UMBRAL_SILENCIO_DB = -35
+DURACION_MINIMA_SILENCIO_S = 0.3
+
+
+def obtener_formato(file_path):
+    """
+    Devuelve la información de formato (duración, bitrate...) de un archivo de audio o video
+    usando ffprobe, sin decodificar el contenido.
+    """
+    comando = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration,bit_rate",
+        "-of", "json",
+        file_path,
+    ]
+    resultado = subprocess.run(comando, capture_output=True, text=True, check=True)
+    return json.loads(resultado.stdout)["format"]
+
+
+def obtener_duracion(file_path):
+    """
+    Devuelve la duración en segundos de un archivo de audio o video.
+    """
+    return float(obtener_formato(file_path)["duration"])
+
+
+def duracion_maxima_por_bytes(file_path, perfil="transcripcion", limite_bytes=LIMITE_BYTES_API, margen=0.9):
+    """
+    Calcula cuántos segundos de audio caben en un segmento sin pasar del límite de bytes de la API,
+    según el bitrate del perfil (o el del archivo original si el perfil copia el audio).
+    """
+    bitrate_kbps = PERFILES_AUDIO[perfil]["bitrate_kbps"]
+    if bitrate_kbps:
+        bits_por_segundo = bitrate_kbps * 1000
+    else:
+        bits_por_segundo = float(obtener_formato(file_path).get("bit_rate") or 192000)
+    return limite_bytes * margen * 8 / bits_por_segundo
+
+
+def buscar_silencio(file_path, objetivo, ventana=VENTANA_SILENCIO_S):
+    """
+    Busca el silencio más cercano antes de `objetivo` (en segundos) dentro de la ventana indicada
+    y devuelve el punto medio de ese silencio. Si no hay ninguno, devuelve `objetivo`.
+    Solo se analiza el tramo de la ventana, no el archivo completo.
+    """
+    inicio_ventana = max(0.0, objetivo - ventana)
+    comando = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-ss", f"{inicio_ventana:.3f}",
+        "-t", f"{objetivo - inicio_ventana:.3f}",
+        "-i", file_path,
+        "-vn", "-af", f"silencedetect=noise={UMBRAL_SILENCIO_DB}dB:d={DURACION_MINIMA_SILENCIO_S}",
+        "-f", "null", "-",
+    ]
+    with span("buscar_silencio"):
+        resultado = subprocess.run(comando, capture_output=True, text=True)
+
+    # Los tiempos de silencedetect son relativos al inicio de la ventana
+    silencios = []
+    inicio_silencio = None
+    for linea in resultado.stderr.splitlines():
+        match = re.search(r"silence_start: (-?[\d.]+)", linea)
+        if match:
+            inicio_silencio = float(match.group(1))
+            continue
+        match = re.search(r"silence_end: (-?[\d.]+)", linea)
+        if match and inicio_silencio is not None:
+            silencios.append((inicio_silencio, float(match.group(1))))
+            inicio_silencio = None
+    if inicio_silencio is not None:
+        # Silencio que llega hasta el final de la ventana
+        silencios.append((inicio_silencio, objetivo - inicio_ventana))
+
+    if not silencios:
+        return objetivo
+
+    inicio, fin = max(silencios, key=lambda s: s[0] + s[1])
+    return inicio_ventana + max(0.0, (inicio + fin) / 2)
+
+
+def planificar_segmentos(file_path, duracion_segmento, ajustar_a_silencios=True):
+    """
+    Genera los límites (indice, inicio, fin) en segundos de cada segmento del archivo.
+    Si `ajustar_a_silencios` es True, cada corte se adelanta al silencio más cercano
+    para no partir palabras por la mitad.
+    """
+    duracion_total = obtener_duracion(file_path)
+    inicio = 0.0
+    indice = 0
+    while inicio < duracion_total:
+        fin = inicio + duracion_segmento
+        if fin >= duracion_total:
+            fin = duracion_total
+        elif ajustar_a_silencios:
+            corte = buscar_silencio(file_path, fin, ventana=min(VENTANA_SILENCIO_S, duracion_segmento / 2))
+            fin = corte if corte > inicio else fin
+        yield indice, inicio, fin
+        inicio = fin
+        indice += 1
+
+
+def extraer_segmento(file_path, inicio, fin, destino, perfil="transcripcion"):
+    """
+    Extrae el tramo [inicio, fin) del archivo directamente con ffmpeg, codificado según el perfil.
+    El `-ss` antes de `-i` hace que ffmpeg salte al punto de inicio sin leer lo anterior,
+    así que la memoria usada no depende de la longitud del archivo.
+    Con `bitexact` el mismo tramo produce siempre los mismos bytes, lo que permite cachear su transcripción.
+    """
+    comando = [
+        "ffmpeg", "-v", "error", "-y",
+        "-ss", f"{inicio:.3f}",
+        "-t", f"{fin - inicio:.3f}",
+        "-i", file_path,
+        "-vn", "-map", "0:a:0",
+        *PERFILES_AUDIO[perfil]["argumentos"],
+        "-fflags", "+bitexact", "-flags:a", "+bitexact",
+        destino,
+    ]
+    with span("exportar_segmento", perfil=perfil) as medicion:
+        subprocess.run(comando, capture_output=True, check=True)
+        medicion.sumar(bytes=os.path.getsize(destino), segundos_audio=fin - inicio)
+    return destino
+
+
+def extraer_audio(file_path, destino, calidad_kbps=192):
+    """
+    Extrae la pista de audio de un archivo de video a MP3, en local, sin volver a descargar nada.
+    """
+    comando = [
+        "ffmpeg", "-v", "error", "-y",
+        "-i", file_path,
+        "-vn", "-map", "0:a:0",
+        "-c:a", "libmp3lame", "-b:a", f"{calidad_kbps}k",
+        destino,
+    ]
+    with span("extraer_audio") as medicion:
+        subprocess.run(comando, capture_output=True, check=True)
+        medicion.sumar(bytes=os.path.getsize(destino))
+    return destino
+
+
+def generar_segmentos(file_path, directorio, duracion_maxima, perfil="transcripcion", limite_bytes=LIMITE_BYTES_API, prefijo="temp_segment", omitir=None):
+    """
+    Extrae los segmentos uno a uno y los va entregando en cuanto están listos,
+    como tuplas (indice, inicio, fin, ruta). Quien los consume debe borrar los archivos.
+    Cada segmento dura como mucho `duracion_maxima` segundos y nunca supera `limite_bytes`.
+    Si se pasa `omitir(indice, inicio, fin)` y devuelve True, ese segmento no se extrae.
+    """
+    extension = PERFILES_AUDIO[perfil]["extension"] or os.path.splitext(file_path)[1] or ".mp3"
+    duracion_segmento = min(duracion_maxima, duracion_maxima_por_bytes(file_path, perfil, limite_bytes))
+    for indice, inicio, fin in planificar_segmentos(file_path, duracion_segmento):
+        if omitir and omitir(indice, inicio, fin):
+            continue
+        destino = os.path.join(directorio, f"{prefijo}_{indice}{extension}")
+        extraer_segmento(file_path, inicio, fin, destino, perfil)
+        yield indice, inicio, fin, destino
@@ -0,0 +1,43 @@
+import os
+import pathlib
+import sqlite3
+from contextlib import contextmanager
+
+
+# Segundos que se espera a que otro proceso suelte el bloqueo antes de fallar
+TIMEOUT_SQLITE_S = 30
+
+
+def conectar(db_path, solo_lectura=False):
+    """
+    Abre una conexión nueva en modo autocommit, con las filas accesibles por nombre.
+    El registro, el índice y la caché usan una por operación para poder compartir
+    la base de datos entre hilos y procesos.
+    Con `solo_lectura=True` no se crea el archivo si no existe ni se puede escribir en él.
+    """
+    if solo_lectura:
+        uri = f"{pathlib.Path(os.path.abspath(db_path)).as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=TIMEOUT_SQLITE_S, isolation_level=None)
+    else:
+        conn = sqlite3.connect(db_path, timeout=TIMEOUT_SQLITE_S, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@contextmanager
+def transaccion(db_path):
+    """
+    Abre una transacción de escritura. `BEGIN IMMEDIATE` toma el bloqueo al empezar,
+    así que las lecturas y escrituras dentro de ella no se mezclan con otros procesos.
+    """
+    conn = conectar(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import time
+
+from BaseDatos import conectar, transaccion
+
+
+# Caché persistente de respuestas de la API (transcripciones y completions)
+CACHE_DB_PATH = os.path.join("data", ".cache", "respuestas.db")
+CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+
+def clave_cache(*partes):
+    """
+    Calcula la clave de caché (sha256) de los parámetros de una petición.
+    """
+    contenido = json.dumps(partes, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def hash_archivo(file_path):
+    """
+    Calcula el sha256 del contenido de un archivo, leyéndolo por bloques.
+    """
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+class CacheRespuestas:
+    """
+    Caché en SQLite direccionada por contenido y con tamaño máximo.
+    Cuando se supera `max_bytes` se eliminan las entradas usadas hace más tiempo (LRU).
+    """
+
+    def __init__(self, db_path: str = CACHE_DB_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = self._conectar()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT PRIMARY KEY,
+                    valor TEXT NOT NULL,
+                    tamano INTEGER NOT NULL,
+                    ultimo_acceso REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_acceso ON respuestas (ultimo_acceso)")
+        finally:
+            conn.close()
+
+    def _conectar(self):
+        return conectar(self.db_path)
+
+    def obtener(self, clave):
+        """
+        Devuelve el valor guardado para la clave, o None si no está, y lo marca como usado.
+        """
+        conn = self._conectar()
+        try:
+            fila = conn.execute("SELECT valor FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                return None
+            conn.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (time.time(), clave))
+            return fila[0]
+        finally:
+            conn.close()
+
+    def guardar(self, clave, valor):
+        """
+        Guarda el valor y, si la caché supera el tamaño máximo, elimina las entradas menos usadas.
+        """
+        tamano = len(valor.encode("utf-8"))
+        with transaccion(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, valor, tamano, ultimo_acceso) VALUES (?, ?, ?, ?)",
+                (clave, valor, tamano, time.time()),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+            if total > self.max_bytes:
+                a_borrar = []
+                for clave_antigua, tamano_antiguo in conn.execute(
+                    "SELECT clave, tamano FROM respuestas WHERE clave != ? ORDER BY ultimo_acceso", (clave,)
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    a_borrar.append((clave_antigua,))
+                    total -= tamano_antiguo
+                conn.executemany("DELETE FROM respuestas WHERE clave = ?", a_borrar)
+
+    def limpiar(self):
+        """
+        Vacía la caché.
+        """
+        conn = self._conectar()
+        try:
+            conn.execute("DELETE FROM respuestas")
+        finally:
+            conn.close()
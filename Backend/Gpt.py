@@ -1,34 +1,439 @@
-from openai import OpenAI
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+
 from decouple import config
+from Cache import CacheRespuestas, clave_cache, hash_archivo, CACHE_MAX_BYTES
+from Metricas import span
+
+
+# El cliente de OpenAI (y la API Key del archivo .env) se cargan en el primer uso, no al importar,
+# para que los comandos que no llaman a la API arranquen rápido y funcionen sin credenciales
+_client = None
+
+def _api_key():
+    return config('OPENAI_API_KEY')
+
+
+def obtener_cliente():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=_api_key())
+    return _client
+
+# Límites del cliente asíncrono: peticiones simultáneas, cuota por minuto y reintentos
+MAX_PETICIONES_EN_VUELO = config('OPENAI_MAX_EN_VUELO', default=8, cast=int)
+PETICIONES_POR_MINUTO = config('OPENAI_RPM', default=500, cast=int)
+TOKENS_POR_MINUTO = config('OPENAI_TPM', default=60000, cast=int)
+REINTENTOS = config('OPENAI_REINTENTOS', default=5, cast=int)
+ESPERA_MAXIMA_S = 60
+
+# Caché de respuestas: se puede desactivar con OPENAI_CACHE=False o con `usar_cache=False` en cada llamada
+CACHE_ACTIVA = config('OPENAI_CACHE', default=True, cast=bool)
+CACHE_MAX_MB = config('OPENAI_CACHE_MAX_MB', default=CACHE_MAX_BYTES // (1024 * 1024), cast=int)
+_cache = None
+
+def obtener_cache():
+    global _cache
+    if _cache is None:
+        _cache = CacheRespuestas(max_bytes=CACHE_MAX_MB * 1024 * 1024)
+    return _cache
 
 
-# Cargar la API Key desde el archivo .env
-api_key = config('OPENAI_API_KEY')
-client = OpenAI(api_key=api_key)
-def transcribe_audio(file_path):
+def _clave_transcripcion(file_path, modelo='whisper-1'):
+    return clave_cache("transcripcion", modelo, hash_archivo(file_path))
+
+
+def _clave_chat(system_prompt, prompt, modelo, temperature, max_tokens):
+    return clave_cache("chat", modelo, system_prompt, prompt, {"temperature": temperature, "max_tokens": max_tokens, "n": 1})
+
+
+def transcribe_audio(file_path, lanzar_errores=False, usar_cache=True):
+    usar_cache = usar_cache and CACHE_ACTIVA
     try:
-        with open(file_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
+        if usar_cache:
+            clave = _clave_transcripcion(file_path)
+            texto = obtener_cache().obtener(clave)
+            if texto is not None:
+                return texto
+        with span("whisper", modelo='whisper-1') as medicion, open(file_path, "rb") as audio_file:
+            medicion.sumar(bytes=os.path.getsize(file_path))
+            transcript = obtener_cliente().audio.transcriptions.create(
                 model='whisper-1',
                 file=audio_file
             )
+        if usar_cache:
+            obtener_cache().guardar(clave, transcript.text)
         return transcript.text
     except Exception as e:
+        # Si se piden los errores, dejamos que el llamador decida si reintentar
+        if lanzar_errores:
+            raise
         print(f"Error transcribiendo el archivo {file_path}: {e}")
         return ""
-    
 
-def get_response_from_openai(system_prompt, prompt,format="Markdown", idioma="Castellano", MODEL='gpt-4-turbo'):
+
+def get_response_from_openai(system_prompt, prompt,format="Markdown", idioma="Castellano", MODEL='gpt-4-turbo', usar_cache=True):
+    usar_cache = usar_cache and CACHE_ACTIVA
+    if usar_cache:
+        clave = _clave_chat(system_prompt, prompt, MODEL, 1, 4096)
+        contenido = obtener_cache().obtener(clave)
+        if contenido is not None:
+            return contenido
+
     messages = [
         {'role': 'system', 'content': system_prompt},
         {'role': 'user', 'content': prompt}
     ]
     # Generar el artículo usando el modelo GPT
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=messages,
-        temperature=1,
-        max_tokens=4096,  # Aumentamos los tokens para generar un artículo completo
-        n=1
-    )
-    return response.choices[0].message.content
\ No newline at end of file
+    with span("chat", modelo=MODEL) as medicion:
+        response = obtener_cliente().chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=1,
+            max_tokens=4096,  # Aumentamos los tokens para generar un artículo completo
+            n=1
+        )
+        _sumar_uso(medicion, response)
+    if usar_cache:
+        obtener_cache().guardar(clave, response.choices[0].message.content)
+    return response.choices[0].message.content
+
+
+def _sumar_uso(medicion, response):
+    """
+    Añade a la medición los tokens de prompt y de respuesta que informa la API.
+    """
+    uso = getattr(response, "usage", None)
+    if uso:
+        medicion.sumar(tokens_prompt=uso.prompt_tokens, tokens_completion=uso.completion_tokens)
+
+
+def estimar_tokens(texto):
+    """
+    Estimación aproximada de tokens de un texto (unos 4 caracteres por token).
+    """
+    return len(texto) // 4 + 1
+
+
+def _partir_unidad(texto, max_tokens):
+    """
+    Parte un texto que no cabe en `max_tokens` por frases, después por palabras y,
+    como último recurso, por caracteres, de forma que ninguna parte supere el límite.
+    """
+    max_caracteres = max(1, 4 * max_tokens - 1)
+    partes = []
+    for frase in re.split(r"(?<=[.!?])\s+", texto):
+        if estimar_tokens(frase) <= max_tokens:
+            partes.append(frase)
+            continue
+        actual = ""
+        for palabra in frase.split():
+            # Una palabra sola que no cabe (p. ej. una URL enorme) se corta por caracteres
+            trozos = [palabra[i:i + max_caracteres] for i in range(0, len(palabra), max_caracteres)]
+            for trozo in trozos:
+                candidata = f"{actual} {trozo}" if actual else trozo
+                if estimar_tokens(candidata) <= max_tokens:
+                    actual = candidata
+                else:
+                    partes.append(actual)
+                    actual = trozo
+        if actual:
+            partes.append(actual)
+    return partes
+
+
+def dividir_por_tokens(texto, max_tokens):
+    """
+    Divide un texto en fragmentos de como mucho `max_tokens` (estimados), cortando por líneas
+    y, si una línea sola no cabe, por frases, palabras o caracteres.
+    """
+    unidades = []
+    for linea in texto.splitlines():
+        if estimar_tokens(linea) <= max_tokens:
+            unidades.append(linea)
+        else:
+            unidades.extend(_partir_unidad(linea, max_tokens))
+
+    fragmentos = []
+    actual = []
+    tokens_actual = 0
+    for unidad in unidades:
+        tokens_unidad = estimar_tokens(unidad)
+        if actual and tokens_actual + tokens_unidad > max_tokens:
+            fragmentos.append("\n".join(actual))
+            actual = []
+            tokens_actual = 0
+        actual.append(unidad)
+        tokens_actual += tokens_unidad
+    if actual:
+        fragmentos.append("\n".join(actual))
+    return [fragmento for fragmento in fragmentos if fragmento.strip()]
+
+
+class LimitadorTasa:
+    """
+    Cubo de fichas para limitar cuántas unidades (peticiones o tokens) se consumen por minuto.
+    """
+
+    def __init__(self, por_minuto):
+        self.capacidad = por_minuto
+        self.disponibles = float(por_minuto)
+        self.tasa = por_minuto / 60
+        self.ultimo = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def adquirir(self, cantidad=1):
+        # Una petición mayor que el cubo entero se deja pasar cuando el cubo está lleno
+        cantidad = min(cantidad, self.capacidad)
+        async with self.lock:
+            while True:
+                ahora = time.monotonic()
+                self.disponibles = min(self.capacidad, self.disponibles + (ahora - self.ultimo) * self.tasa)
+                self.ultimo = ahora
+                if self.disponibles >= cantidad:
+                    self.disponibles -= cantidad
+                    return
+                await asyncio.sleep((cantidad - self.disponibles) / self.tasa)
+
+
+class ClienteAsync:
+    """
+    Cliente asíncrono de OpenAI con límite de peticiones en vuelo, limitación de cuota,
+    reintentos con espera exponencial ante 429/5xx y unión de peticiones idénticas simultáneas.
+    Hay uno solo por proceso y vive en el bucle de eventos compartido (ver `ejecutar_async`),
+    así que los límites se reparten entre todos los hilos y videos en lugar de multiplicarse.
+    """
+
+    def __init__(self):
+        from openai import AsyncOpenAI
+        self.cliente = AsyncOpenAI(api_key=_api_key(), max_retries=0)
+        self.semaforo = asyncio.Semaphore(MAX_PETICIONES_EN_VUELO)
+        self.peticiones = LimitadorTasa(PETICIONES_POR_MINUTO)
+        self.tokens = LimitadorTasa(TOKENS_POR_MINUTO)
+        self.en_curso = {}
+
+    async def ejecutar(self, llamada, tokens_estimados=0, consumir=None):
+        """
+        Ejecuta `llamada` (una función que devuelve la corrutina de la petición) respetando
+        los límites y reintentando los errores transitorios.
+        Si se pasa `consumir`, se aplica a la respuesta sin soltar el hueco de petición en vuelo
+        (para leer una respuesta en streaming entera) y un fallo durante la lectura también se reintenta.
+        """
+        from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+        for intento in range(REINTENTOS + 1):
+            await self.peticiones.adquirir()
+            if tokens_estimados:
+                await self.tokens.adquirir(tokens_estimados)
+            try:
+                async with self.semaforo:
+                    respuesta = await llamada()
+                    return await consumir(respuesta) if consumir else respuesta
+            except (RateLimitError, APIConnectionError, APITimeoutError, APIStatusError) as e:
+                status = getattr(e, "status_code", None)
+                transitorio = status is None or status == 429 or status >= 500
+                if not transitorio or intento == REINTENTOS:
+                    raise
+                espera = min(ESPERA_MAXIMA_S, 2 ** intento) + random.random()
+                respuesta = getattr(e, "response", None)
+                if respuesta is not None and respuesta.headers.get("retry-after"):
+                    try:
+                        espera = max(espera, float(respuesta.headers["retry-after"]))
+                    except ValueError:
+                        pass
+                print(f"Error de OpenAI ({status or type(e).__name__}). Reintentando en {espera:.1f}s...")
+                await asyncio.sleep(espera)
+
+    async def unificar(self, clave, fabrica):
+        """
+        Si ya hay una petición en curso con la misma clave, espera su resultado en lugar de repetirla.
+        """
+        tarea = self.en_curso.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(fabrica())
+            self.en_curso[clave] = tarea
+            tarea.add_done_callback(lambda _: self.en_curso.pop(clave, None))
+        # shield: si quien espera se cancela, la petición sigue para los demás
+        return await asyncio.shield(tarea)
+
+
+_bucle = None
+_cliente_compartido = None
+_lock_bucle = threading.Lock()
+
+
+def _bucle_compartido():
+    """
+    Devuelve el bucle de eventos del proceso para las llamadas asíncronas a OpenAI,
+    arrancándolo en un hilo propio la primera vez.
+    """
+    global _bucle
+    with _lock_bucle:
+        if _bucle is None:
+            bucle = asyncio.new_event_loop()
+            threading.Thread(target=bucle.run_forever, name="openai-async", daemon=True).start()
+            _bucle = bucle
+    return _bucle
+
+
+def ejecutar_async(corrutina):
+    """
+    Ejecuta la corrutina en el bucle compartido y espera su resultado desde código síncrono.
+    Todas las llamadas asíncronas a OpenAI pasan por aquí para compartir un único cliente,
+    con sus límites de cuota y de peticiones en vuelo.
+    """
+    return asyncio.run_coroutine_threadsafe(corrutina, _bucle_compartido()).result()
+
+
+def _cliente_async():
+    # Solo se usa desde el hilo del bucle compartido, así que no hace falta lock
+    global _cliente_compartido
+    if asyncio.get_running_loop() is not _bucle:
+        raise RuntimeError("Las llamadas asíncronas a OpenAI deben ejecutarse con Gpt.ejecutar_async")
+    if _cliente_compartido is None:
+        _cliente_compartido = ClienteAsync()
+    return _cliente_compartido
+
+
+def _leer_archivo(file_path):
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+async def transcribe_audio_async(file_path, usar_cache=True):
+    """
+    Versión asíncrona de `transcribe_audio`. Los errores no se ocultan: se reintentan
+    los transitorios y el resto se lanzan.
+    """
+    usar_cache = usar_cache and CACHE_ACTIVA
+    cliente = _cliente_async()
+    # El hash y la lectura se hacen en otro hilo para no frenar el bucle compartido
+    clave = await asyncio.to_thread(_clave_transcripcion, file_path)
+    if usar_cache:
+        texto = obtener_cache().obtener(clave)
+        if texto is not None:
+            return texto
+    datos = await asyncio.to_thread(_leer_archivo, file_path)
+
+    async def peticion():
+        with span("whisper", modelo='whisper-1') as medicion:
+            medicion.sumar(bytes=len(datos))
+            transcript = await cliente.ejecutar(lambda: cliente.cliente.audio.transcriptions.create(
+                model='whisper-1',
+                file=(os.path.basename(file_path), datos)
+            ))
+        if usar_cache:
+            obtener_cache().guardar(clave, transcript.text)
+        return transcript.text
+
+    return await cliente.unificar(clave, peticion)
+
+
+async def get_response_from_openai_async(system_prompt, prompt, format="Markdown", idioma="Castellano", MODEL='gpt-4-turbo', usar_cache=True):
+    """
+    Versión asíncrona de `get_response_from_openai`.
+    """
+    usar_cache = usar_cache and CACHE_ACTIVA
+    cliente = _cliente_async()
+    messages = [
+        {'role': 'system', 'content': system_prompt},
+        {'role': 'user', 'content': prompt}
+    ]
+    max_tokens = 4096
+    clave = _clave_chat(system_prompt, prompt, MODEL, 1, max_tokens)
+    if usar_cache:
+        contenido = obtener_cache().obtener(clave)
+        if contenido is not None:
+            return contenido
+    tokens_estimados = estimar_tokens(system_prompt) + estimar_tokens(prompt) + max_tokens
+
+    async def peticion():
+        with span("chat", modelo=MODEL) as medicion:
+            response = await cliente.ejecutar(lambda: cliente.cliente.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                temperature=1,
+                max_tokens=max_tokens,
+                n=1
+            ), tokens_estimados)
+            _sumar_uso(medicion, response)
+        if usar_cache:
+            obtener_cache().guardar(clave, response.choices[0].message.content)
+        return response.choices[0].message.content
+
+    return await cliente.unificar(clave, peticion)
+
+
+async def stream_response_from_openai_async(system_prompt, prompt, destino, MODEL='gpt-4-turbo', usar_cache=True):
+    """
+    Como `get_response_from_openai_async`, pero pide la respuesta en streaming y la va escribiendo
+    en `destino` según llegan los tokens (primero en `destino.parcial`, que se renombra al terminar).
+    Solo se guarda en la caché la respuesta completa. Devuelve el texto completo.
+    """
+    usar_cache = usar_cache and CACHE_ACTIVA
+    max_tokens = 4096
+    clave = _clave_chat(system_prompt, prompt, MODEL, 1, max_tokens)
+    if usar_cache:
+        contenido = obtener_cache().obtener(clave)
+        if contenido is not None:
+            with open(destino, "w", encoding="utf-8") as f:
+                f.write(contenido)
+            return contenido
+
+    cliente = _cliente_async()
+    messages = [
+        {'role': 'system', 'content': system_prompt},
+        {'role': 'user', 'content': prompt}
+    ]
+    tokens_estimados = estimar_tokens(system_prompt) + estimar_tokens(prompt) + max_tokens
+    ruta_parcial = f"{destino}.parcial"
+
+    async def peticion():
+        with span("chat_stream", modelo=MODEL) as medicion:
+            inicio = time.perf_counter()
+
+            async def leer(respuesta):
+                # Cada reintento vuelve a escribir el archivo parcial desde el principio
+                partes = []
+                with open(ruta_parcial, "w", encoding="utf-8") as f:
+                    async for chunk in respuesta:
+                        _sumar_uso(medicion, chunk)
+                        texto = chunk.choices[0].delta.content if chunk.choices else None
+                        if not texto:
+                            continue
+                        if not partes:
+                            medicion.anotar(primer_token_s=time.perf_counter() - inicio)
+                        partes.append(texto)
+                        f.write(texto)
+                        f.flush()
+                return "".join(partes)
+
+            try:
+                contenido = await cliente.ejecutar(lambda: cliente.cliente.chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                    temperature=1,
+                    max_tokens=max_tokens,
+                    n=1,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                ), tokens_estimados, consumir=leer)
+            except BaseException:
+                if os.path.exists(ruta_parcial):
+                    os.remove(ruta_parcial)
+                raise
+        os.replace(ruta_parcial, destino)
+        if usar_cache:
+            obtener_cache().guardar(clave, contenido)
+        return contenido, destino
+
+    # Una petición idéntica en curso se espera; si escribía en otro archivo se copia el resultado
+    contenido, escrito = await cliente.unificar(clave, peticion)
+    if escrito != destino:
+        with open(destino, "w", encoding="utf-8") as f:
+            f.write(contenido)
+    return contenido
@@ -0,0 +1,44 @@
+import threading
+
+
+# Tiempo máximo para conectar y para recibir cada bloque de datos, en segundos
+TIMEOUT_S = (5, 30)
+
+# Conexiones que se mantienen abiertas por host; debe cubrir los hilos que descargan a la vez
+MAX_CONEXIONES_POR_HOST = 16
+
+# Reintentos ante errores de conexión y respuestas 5xx
+REINTENTOS_HTTP = 2
+
+_sesion = None
+_lock = threading.Lock()
+
+
+def obtener_sesion():
+    """
+    Devuelve la sesión HTTP compartida por todo el proceso. Reutiliza las conexiones
+    (keep-alive) entre peticiones y reintenta los errores transitorios.
+    """
+    global _sesion
+    with _lock:
+        if _sesion is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            reintentos = Retry(
+                total=REINTENTOS_HTTP,
+                backoff_factor=0.5,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=("GET", "HEAD"),
+            )
+            adaptador = HTTPAdapter(
+                pool_connections=MAX_CONEXIONES_POR_HOST,
+                pool_maxsize=MAX_CONEXIONES_POR_HOST,
+                max_retries=reintentos,
+            )
+            sesion = requests.Session()
+            sesion.mount("http://", adaptador)
+            sesion.mount("https://", adaptador)
+            _sesion = sesion
+    return _sesion
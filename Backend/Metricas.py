@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Contadores que se suman por etapa en el resumen
+CONTADORES = ("bytes", "segundos_audio", "tokens_prompt", "tokens_completion")
+
+_lock = threading.Lock()
+_spans = []
+_activo = False
+_archivo = None
+
+
+class Span:
+    """
+    Medición de una operación: nombre, duración, contadores (bytes, tokens...) y atributos libres.
+    """
+
+    def __init__(self, nombre, atributos):
+        self.nombre = nombre
+        self.atributos = dict(atributos)
+        self.contadores = {}
+        self.inicio = time.time()
+        self.duracion_s = None
+
+    def sumar(self, **contadores):
+        """
+        Suma valores a los contadores del span (por ejemplo `bytes=...` o `tokens_prompt=...`).
+        """
+        for clave, valor in contadores.items():
+            if valor:
+                self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    def anotar(self, **atributos):
+        self.atributos.update(atributos)
+
+    def a_dict(self):
+        return {
+            "span": self.nombre,
+            "inicio": self.inicio,
+            "duracion_s": self.duracion_s,
+            "hilo": threading.current_thread().name,
+            **self.contadores,
+            **self.atributos,
+        }
+
+
+class _SpanNulo:
+    """
+    Span que no hace nada, para cuando las métricas están desactivadas.
+    """
+
+    def sumar(self, **contadores):
+        pass
+
+    def anotar(self, **atributos):
+        pass
+
+
+def activar(ruta=None):
+    """
+    Activa la recogida de métricas. Si se indica `ruta`, cada span se escribe al terminar
+    como una línea JSON en ese archivo.
+    """
+    global _activo, _archivo
+    with _lock:
+        _activo = True
+        _spans.clear()
+        if ruta:
+            _archivo = open(ruta, "w", encoding="utf-8")
+
+
+def desactivar():
+    global _activo, _archivo
+    with _lock:
+        _activo = False
+        if _archivo:
+            _archivo.close()
+            _archivo = None
+
+
+def activo():
+    return _activo
+
+
+@contextmanager
+def span(nombre, **atributos):
+    """
+    Mide el tiempo de pared del bloque y lo registra con los contadores que se le sumen.
+    Si las métricas no están activas no mide nada.
+    """
+    if not _activo:
+        yield _SpanNulo()
+        return
+
+    actual = Span(nombre, atributos)
+    inicio = time.perf_counter()
+    try:
+        yield actual
+    except BaseException as e:
+        actual.anotar(error=repr(e))
+        raise
+    finally:
+        actual.duracion_s = time.perf_counter() - inicio
+        registro = actual.a_dict()
+        with _lock:
+            _spans.append(registro)
+            if _archivo:
+                _archivo.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+                _archivo.flush()
+
+
+def resumen():
+    """
+    Agrupa los spans por nombre: número de llamadas, tiempo total, medio y máximo,
+    y la suma de cada contador.
+    """
+    with _lock:
+        spans = list(_spans)
+    por_nombre = {}
+    for registro in spans:
+        fila = por_nombre.setdefault(registro["span"], {
+            "span": registro["span"], "llamadas": 0, "total_s": 0.0, "max_s": 0.0, "errores": 0,
+            **{contador: 0 for contador in CONTADORES},
+        })
+        fila["llamadas"] += 1
+        fila["total_s"] += registro["duracion_s"]
+        fila["max_s"] = max(fila["max_s"], registro["duracion_s"])
+        fila["errores"] += 1 if "error" in registro else 0
+        for contador in CONTADORES:
+            fila[contador] += registro.get(contador, 0)
+    for fila in por_nombre.values():
+        fila["medio_s"] = fila["total_s"] / fila["llamadas"]
+    return sorted(por_nombre.values(), key=lambda fila: fila["total_s"], reverse=True)
+
+
+def imprimir_resumen():
+    """
+    Imprime el resumen de métricas como tabla.
+    """
+    filas = resumen()
+    print(f"{'Span':<24}{'Llamadas':>9}{'Total (s)':>11}{'Medio (s)':>11}{'Máx (s)':>9}"
+          f"{'MB':>9}{'Audio (s)':>11}{'Tok. prompt':>13}{'Tok. compl.':>13}")
+    for fila in filas:
+        print(f"{fila['span']:<24}{fila['llamadas']:>9}{fila['total_s']:>11.2f}{fila['medio_s']:>11.2f}{fila['max_s']:>9.2f}"
+              f"{fila['bytes'] / (1024 * 1024):>9.1f}{fila['segundos_audio']:>11.0f}{fila['tokens_prompt']:>13}{fila['tokens_completion']:>13}")
+    return filas
@@ -0,0 +1,170 @@
+import html
+import re
+import xml.etree.ElementTree as ET
+from collections import deque
+
+from Http import obtener_sesion, TIMEOUT_S
+
+
+# Formatos de subtítulos que sabemos leer, por orden de preferencia
+FORMATOS_SUBTITULOS = ("vtt", "srv3", "srv2", "srv1")
+
+# Duración de los bloques de texto en los que se agrupan los subtítulos al escribir la transcripción
+SEGUNDOS_POR_BLOQUE = 60
+
+# Número de líneas recientes que se recuerdan para descartar las repeticiones de los subtítulos automáticos
+LINEAS_RECORDADAS = 3
+
+
+def _candidatos(pistas_por_idioma, idioma):
+    # Primero el código exacto ("es") y luego variantes regionales ("es-ES", "es-419"...)
+    candidatos = [idioma] if idioma in pistas_por_idioma else []
+    candidatos += sorted(clave for clave in pistas_por_idioma if clave.startswith(f"{idioma}-"))
+    return candidatos
+
+
+def _candidatos_automaticos(info_dict, pistas_por_idioma, idioma):
+    """
+    YouTube ofrece en los subtítulos automáticos una traducción a cada idioma con su código normal,
+    así que solo se aceptan los del idioma original del video: `<idioma>-orig`, o cualquier
+    variante si `language` indica que el video está en ese idioma.
+    """
+    original = (info_dict.get("language") or "").split("-")[0]
+    if original == idioma:
+        return _candidatos(pistas_por_idioma, idioma)
+    return [f"{idioma}-orig"] if f"{idioma}-orig" in pistas_por_idioma else []
+
+
+def elegir_subtitulos(info_dict, idiomas):
+    """
+    Elige la pista de subtítulos a usar recorriendo `idiomas` por orden; para cada idioma se
+    prefieren los subtítulos manuales a los automáticos, y de estos solo los del idioma original.
+    Devuelve (idioma, automaticos, pista) o None si no hay ninguna pista en un formato conocido.
+    """
+    manuales = info_dict.get("subtitles") or {}
+    automaticos = info_dict.get("automatic_captions") or {}
+    for idioma in idiomas:
+        fuentes = (
+            (False, manuales, _candidatos(manuales, idioma)),
+            (True, automaticos, _candidatos_automaticos(info_dict, automaticos, idioma)),
+        )
+        for es_automatico, pistas_por_idioma, candidatos in fuentes:
+            for clave in candidatos:
+                pistas = {pista.get("ext"): pista for pista in pistas_por_idioma[clave] if pista.get("url")}
+                for formato in FORMATOS_SUBTITULOS:
+                    if formato in pistas:
+                        return clave, es_automatico, pistas[formato]
+    return None
+
+
+def _segundos_vtt(marca):
+    partes = marca.split(":")
+    segundos = float(partes[-1])
+    for i, parte in enumerate(reversed(partes[:-1])):
+        segundos += int(parte) * 60 ** (i + 1)
+    return segundos
+
+
+def _limpiar(texto):
+    texto = re.sub(r"<[^>]+>", "", texto)
+    texto = html.unescape(texto)
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def parsear_vtt(lineas):
+    """
+    Lee un WebVTT línea a línea y genera (inicio, texto) por cada línea de texto de cada cue.
+    """
+    inicio = None
+    en_bloque_ignorado = False
+    for linea in lineas:
+        linea = linea.rstrip("\r\n")
+        # Solo una línea vacía separa cues: YouTube mete líneas con un espacio dentro de los cues
+        if not linea:
+            inicio = None
+            en_bloque_ignorado = False
+            continue
+        if en_bloque_ignorado:
+            continue
+        if "-->" in linea:
+            inicio = _segundos_vtt(linea.split("-->")[0].strip())
+            continue
+        if inicio is None:
+            # Cabecera, identificadores de cue y bloques NOTE/STYLE/REGION
+            if linea.startswith(("NOTE", "STYLE", "REGION")):
+                en_bloque_ignorado = True
+            continue
+        texto = _limpiar(linea)
+        if texto:
+            yield inicio, texto
+
+
+def parsear_srv(origen):
+    """
+    Lee los formatos XML de YouTube (srv1, srv2 y srv3) de forma incremental
+    y genera (inicio, texto) por cada línea de texto.
+    """
+    for _, elemento in ET.iterparse(origen, events=("end",)):
+        if elemento.tag == "text" and elemento.get("start") is not None:
+            inicio = float(elemento.get("start"))  # srv1, en segundos
+        elif elemento.tag in ("text", "p") and elemento.get("t") is not None:
+            inicio = int(elemento.get("t")) / 1000  # srv2 y srv3, en milisegundos
+        else:
+            continue
+        for linea in "".join(elemento.itertext()).splitlines():
+            texto = _limpiar(linea)
+            if texto:
+                yield inicio, texto
+        elemento.clear()
+
+
+def deduplicar(lineas, recordadas=LINEAS_RECORDADAS):
+    """
+    Descarta las líneas que repiten alguna de las últimas emitidas. Los subtítulos automáticos
+    de YouTube van "rodando": cada cue repite la línea anterior antes de añadir la nueva.
+    """
+    ultimas = deque(maxlen=recordadas)
+    for inicio, texto in lineas:
+        if texto in ultimas:
+            continue
+        ultimas.append(texto)
+        yield inicio, texto
+
+
+def agrupar_en_bloques(lineas, segundos=SEGUNDOS_POR_BLOQUE):
+    """
+    Agrupa las líneas en bloques de texto de unos `segundos`, como tuplas (inicio, fin, texto).
+    """
+    bloques = []
+    inicio_bloque = None
+    ultimo_inicio = None
+    textos = []
+    for inicio, texto in lineas:
+        ultimo_inicio = inicio
+        if inicio_bloque is None:
+            inicio_bloque = inicio
+        elif inicio - inicio_bloque >= segundos:
+            bloques.append((inicio_bloque, inicio, " ".join(textos)))
+            inicio_bloque = inicio
+            textos = []
+        textos.append(texto)
+    if textos:
+        bloques.append((inicio_bloque, ultimo_inicio, " ".join(textos)))
+    return bloques
+
+
+def descargar_subtitulos(pista, sesion=None, timeout=TIMEOUT_S):
+    """
+    Descarga una pista de subtítulos en streaming y la devuelve ya limpia como bloques
+    (inicio, fin, texto), sin guardar el archivo original en disco.
+    """
+    sesion = sesion or obtener_sesion()
+    with sesion.get(pista["url"], stream=True, timeout=timeout) as respuesta:
+        respuesta.raise_for_status()
+        if pista.get("ext") == "vtt":
+            respuesta.encoding = "utf-8"
+            lineas = parsear_vtt(respuesta.iter_lines(decode_unicode=True))
+        else:
+            respuesta.raw.decode_content = True
+            lineas = parsear_srv(respuesta.raw)
+        return agrupar_en_bloques(deduplicar(lineas))
@@ -0,0 +1,128 @@
+"""
+Benchmark del pipeline completo sin red: YouTube y OpenAI se sustituyen por servidores locales
+y el audio es sintético. Mide la latencia de cada etapa, el pico de memoria y los videos por hora.
+
+Uso (desde Backend):
+    python benchmarks/benchmark.py --videos 6 --duracion 1800 --latencia 0.5
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import string
+import sys
+import tempfile
+import time
+
+# Los módulos del proyecto se importan igual que desde main.py
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from simulados import (generar_medios, instalar_extractor_falso, servidor_medios,
+                       servidor_openai, EstadoOpenAIFalso)
+
+
+def _id_aleatorio():
+    return "".join(random.choices(string.ascii_letters + string.digits, k=11))
+
+
+def _pico_memoria_mb():
+    """
+    Pico de memoria residente del proceso y de sus hijos (ffmpeg) en MB.
+    """
+    propio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return propio / divisor, hijos / divisor
+
+
+def ejecutar(args):
+    directorio = tempfile.mkdtemp(prefix="benchmark_")
+    print(f"Directorio de trabajo: {directorio}")
+
+    print(f"Generando {args.duracion}s de audio y video sintéticos...")
+    inicio = time.time()
+    medios = generar_medios(os.path.join(directorio, "medios"), args.duracion, con_subtitulos=args.subtitulos)
+    print(f"Medios generados en {time.time() - inicio:.1f}s")
+
+    _, url_medios = servidor_medios(medios)
+    estado_openai = EstadoOpenAIFalso(args.latencia, args.latencia_por_mb, args.rpm)
+    _, url_openai = servidor_openai(estado_openai)
+    instalar_extractor_falso(url_medios, args.duracion, con_subtitulos=args.subtitulos)
+
+    # Gpt lee la configuración al importarse, así que hay que prepararla antes
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+    os.environ["OPENAI_BASE_URL"] = f"{url_openai}/v1"
+    if not args.cache:
+        os.environ["OPENAI_CACHE"] = "False"
+    os.chdir(directorio)
+
+    import Metricas
+    import classes.YouTube
+    from classes.Pipeline import Pipeline, etapas_por_defecto
+
+    classes.YouTube.URL_MINIATURA = f"{url_medios}/{{resolucion}}.jpg"
+    etapas = etapas_por_defecto(solo_audio=args.solo_audio, workers=args.workers,
+                                artefactos=classes.YouTube.parsear_artefactos(args.artefactos))
+
+    urls = [f"https://www.youtube.com/watch?v={_id_aleatorio()}" for _ in range(args.videos)]
+    Metricas.activar(os.path.join(directorio, "profile.jsonl"))
+    inicio = time.time()
+    informe_etapas = Pipeline(etapas=etapas, tam_cola=args.cola, max_concurrencia=args.concurrencia).procesar(urls)
+    total_s = time.time() - inicio
+    spans = Metricas.resumen()
+    Metricas.desactivar()
+
+    memoria_propia, memoria_hijos = _pico_memoria_mb()
+    completados = min(fila["procesados"] for fila in informe_etapas)
+    resultado = {
+        "videos": args.videos,
+        "duracion_video_s": args.duracion,
+        "completados": completados,
+        "total_s": total_s,
+        "videos_por_hora": completados * 3600 / total_s if total_s else 0.0,
+        "pico_rss_mb": memoria_propia,
+        "pico_rss_hijos_mb": memoria_hijos,
+        "peticiones_openai": estado_openai.peticiones,
+        "rechazadas_openai": estado_openai.rechazadas,
+        "etapas": informe_etapas,
+        "spans": spans,
+    }
+
+    print()
+    Metricas.imprimir_resumen()
+    print()
+    print(f"Videos completados: {completados}/{args.videos} en {total_s:.1f}s ({resultado['videos_por_hora']:.1f} videos/h)")
+    print(f"Pico de memoria: {memoria_propia:.0f} MB (proceso), {memoria_hijos:.0f} MB (ffmpeg)")
+    print(f"Peticiones a OpenAI: {estado_openai.peticiones} ({estado_openai.rechazadas} rechazadas por límite)")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"Resultados guardados en {args.salida}")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline con YouTube y OpenAI simulados en local.")
+    parser.add_argument("--videos", type=int, default=4, help="Número de videos a procesar")
+    parser.add_argument("--duracion", type=int, default=1800, help="Duración de cada video sintético en segundos")
+    parser.add_argument("--latencia", type=float, default=0.5, help="Latencia base de cada petición a OpenAI en segundos")
+    parser.add_argument("--latencia-por-mb", type=float, default=0.5, help="Latencia extra de Whisper por MB de audio subido")
+    parser.add_argument("--rpm", type=int, default=None, help="Límite de peticiones por minuto del OpenAI simulado (sin límite por defecto)")
+    parser.add_argument("--concurrencia", type=int, default=4, help="Segmentos que se transcriben a la vez por video")
+    parser.add_argument("--workers", type=int, default=2, help="Hilos por etapa")
+    parser.add_argument("--cola", type=int, default=4, help="Tamaño de las colas entre etapas")
+    parser.add_argument("--solo-audio", action="store_true", help="Descargar solo el audio")
+    parser.add_argument("--subtitulos", action="store_true", help="Ofrecer subtítulos automáticos en lugar de transcribir con Whisper")
+    parser.add_argument("--artefactos", type=str, default="resumen:markdown", help="Artefactos a generar por video, como tipo:formato separados por comas")
+    parser.add_argument("--cache", action="store_true", help="Usar la caché de respuestas de OpenAI")
+    parser.add_argument("--salida", type=str, help="Guardar los resultados en este archivo JSON")
+    ejecutar(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import functools
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler, SimpleHTTPRequestHandler
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+
+def generar_medios(directorio, duracion_s, con_subtitulos=False):
+    """
+    Genera con ffmpeg los archivos sintéticos que sirve el servidor de medios:
+    audio tipo voz (tonos con un silencio cada pocos segundos), video de baja resolución
+    sin audio, una miniatura y, opcionalmente, subtítulos VTT. La miniatura solo existe
+    en resolución `hqdefault`, para que se recorran las resoluciones de respaldo.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    audio = os.path.join(directorio, "audio.m4a")
+    video = os.path.join(directorio, "video.mp4")
+    miniatura = os.path.join(directorio, "hqdefault.jpg")
+
+    if not os.path.exists(audio):
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y",
+            "-f", "lavfi", "-i", f"aevalsrc='if(lt(mod(t,7),6),0.5*sin(220*2*PI*t)*sin(3*PI*t),0)':s=16000:d={duracion_s}",
+            "-c:a", "aac", "-b:a", "64k", audio,
+        ], check=True)
+    if not os.path.exists(video):
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc=size=160x120:rate=1:duration={duracion_s}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-an", video,
+        ], check=True)
+    if not os.path.exists(miniatura):
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc=size=1280x720", "-frames:v", "1", miniatura,
+        ], check=True)
+    if con_subtitulos:
+        with open(os.path.join(directorio, "subtitulos.vtt"), "w", encoding="utf-8") as f:
+            f.write("WEBVTT\n\n")
+            for inicio in range(0, int(duracion_s), 3):
+                f.write(f"{time.strftime('%H:%M:%S', time.gmtime(inicio))}.000 --> "
+                        f"{time.strftime('%H:%M:%S', time.gmtime(inicio + 3))}.000\n"
+                        f"frase sintética número {inicio // 3}\n\n")
+    return directorio
+
+
+class YoutubeFalsoIE(InfoExtractor):
+    """
+    Extractor de yt_dlp que responde a las URLs de YouTube con metadatos sintéticos
+    cuyos formatos apuntan al servidor de medios local.
+    """
+    _VALID_URL = r'https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/)(?P<id>[0-9A-Za-z_-]{11})'
+
+    url_base = None
+    con_subtitulos = False
+    duracion_s = None
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        info = {
+            'id': video_id,
+            'title': f'Video sintetico {video_id}',
+            'duration': self.duracion_s,
+            'webpage_url': url,
+            'formats': [
+                {'format_id': 'audio', 'url': f'{self.url_base}/audio.m4a', 'ext': 'm4a',
+                 'acodec': 'mp4a.40.2', 'vcodec': 'none', 'abr': 64, 'language': 'es'},
+                {'format_id': 'video', 'url': f'{self.url_base}/video.mp4', 'ext': 'mp4',
+                 'vcodec': 'avc1', 'acodec': 'none', 'width': 160, 'height': 120},
+            ],
+        }
+        if self.con_subtitulos:
+            info['automatic_captions'] = {'es': [{'ext': 'vtt', 'url': f'{self.url_base}/subtitulos.vtt'}]}
+        return info
+
+
+class YoutubeDLFalso(yt_dlp.YoutubeDL):
+    """
+    YoutubeDL que prueba el extractor falso antes que los reales.
+    """
+
+    def __init__(self, params=None, auto_init=True):
+        super().__init__(params, auto_init)
+        self.add_info_extractor(YoutubeFalsoIE())
+        clave = YoutubeFalsoIE.ie_key()
+        self._ies = {clave: self._ies.pop(clave), **self._ies}
+
+
+def instalar_extractor_falso(url_base, duracion_s, con_subtitulos=False):
+    """
+    Sustituye yt_dlp.YoutubeDL por la versión con el extractor falso.
+    """
+    YoutubeFalsoIE.url_base = url_base
+    YoutubeFalsoIE.duracion_s = duracion_s
+    YoutubeFalsoIE.con_subtitulos = con_subtitulos
+    yt_dlp.YoutubeDL = YoutubeDLFalso
+
+
+def _arrancar(servidor):
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}"
+
+
+def servidor_medios(directorio):
+    """
+    Arranca un servidor HTTP local que sirve los archivos sintéticos. Devuelve (servidor, url_base).
+    """
+    class Manejador(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Manejador, directory=directorio))
+    return servidor, _arrancar(servidor)
+
+
+class EstadoOpenAIFalso:
+    """
+    Configuración y contadores del servidor que imita la API de OpenAI.
+    """
+
+    def __init__(self, latencia_s=0.5, latencia_por_mb_s=0.5, peticiones_por_minuto=None):
+        self.latencia_s = latencia_s
+        self.latencia_por_mb_s = latencia_por_mb_s
+        self.peticiones_por_minuto = peticiones_por_minuto
+        self.recientes = deque()
+        self.peticiones = 0
+        self.rechazadas = 0
+        self.lock = threading.Lock()
+
+    def admitir(self):
+        """
+        Ventana deslizante de un minuto: devuelve los segundos a esperar si se supera el límite, o 0.
+        """
+        with self.lock:
+            self.peticiones += 1
+            ahora = time.monotonic()
+            while self.recientes and ahora - self.recientes[0] > 60:
+                self.recientes.popleft()
+            if self.peticiones_por_minuto and len(self.recientes) >= self.peticiones_por_minuto:
+                self.rechazadas += 1
+                return 60 - (ahora - self.recientes[0])
+            self.recientes.append(ahora)
+            return 0
+
+
+def servidor_openai(estado):
+    """
+    Arranca un servidor HTTP local que imita los endpoints de transcripción y chat de OpenAI,
+    con latencia y límite de peticiones configurables. Devuelve (servidor, url_base).
+    """
+    class Manejador(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _responder(self, status, cuerpo, cabeceras=None):
+            datos = json.dumps(cuerpo).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(datos)))
+            for clave, valor in (cabeceras or {}).items():
+                self.send_header(clave, valor)
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def _responder_stream(self, peticion, contenido, tokens_prompt):
+            """
+            Respuesta en streaming (Server-Sent Events): la latencia se reparte entre las palabras.
+            """
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            palabras = contenido.split(" ")
+            base = {"id": "chatcmpl-falso", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": peticion.get("model")}
+            eventos = [{**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}]
+            for i, palabra in enumerate(palabras):
+                texto = palabra if i == 0 else f" {palabra}"
+                eventos.append({**base, "choices": [{"index": 0, "delta": {"content": texto}, "finish_reason": None}]})
+            eventos.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (peticion.get("stream_options") or {}).get("include_usage"):
+                eventos.append({**base, "choices": [], "usage": {
+                    "prompt_tokens": tokens_prompt, "completion_tokens": len(contenido) // 4,
+                    "total_tokens": tokens_prompt + len(contenido) // 4}})
+            for evento in eventos:
+                time.sleep(estado.latencia_s / len(eventos))
+                self.wfile.write(f"data: {json.dumps(evento)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+        def do_POST(self):
+            cuerpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            espera = estado.admitir()
+            if espera:
+                self._responder(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                {"retry-after": f"{espera:.1f}"})
+                return
+
+            if self.path.endswith("/audio/transcriptions"):
+                time.sleep(estado.latencia_s + estado.latencia_por_mb_s * len(cuerpo) / (1024 * 1024))
+                self._responder(200, {"text": f"transcripción sintética de {len(cuerpo)} bytes."})
+            elif self.path.endswith("/chat/completions"):
+                peticion = json.loads(cuerpo)
+                tokens_prompt = sum(len(m["content"]) for m in peticion["messages"]) // 4
+                contenido = f"Resumen sintético de {tokens_prompt} tokens."
+                if peticion.get("stream"):
+                    self._responder_stream(peticion, contenido, tokens_prompt)
+                    return
+                time.sleep(estado.latencia_s)
+                self._responder(200, {
+                    "id": "chatcmpl-falso", "object": "chat.completion", "created": int(time.time()),
+                    "model": peticion.get("model"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": contenido}}],
+                    "usage": {"prompt_tokens": tokens_prompt, "completion_tokens": len(contenido) // 4,
+                              "total_tokens": tokens_prompt + len(contenido) // 4},
+                })
+            else:
+                self._responder(404, {"error": {"message": f"Ruta desconocida: {self.path}"}})
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    return servidor, _arrancar(servidor)
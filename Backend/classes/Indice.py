@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import time
+
+from BaseDatos import conectar, transaccion
+
+
+# Base de datos del índice de búsqueda de las transcripciones
+INDICE_DB_PATH = "indice_transcripciones.db"
+
+# Número de resultados por defecto y palabras de contexto en cada fragmento
+RESULTADOS_POR_DEFECTO = 20
+PALABRAS_FRAGMENTO = 16
+
+
+def _consulta_literal(texto):
+    """
+    Convierte un texto libre en una consulta FTS5 que busca todas sus palabras,
+    escapándolas para que comillas, guiones u operadores no den errores de sintaxis.
+    """
+    return " ".join('"' + palabra.replace('"', '""') + '"' for palabra in texto.split())
+
+
+class IndiceBusqueda:
+    """
+    Índice de texto completo (SQLite FTS5) de las transcripciones, con una fila por segmento
+    y sus marcas de tiempo. Los resultados se ordenan por relevancia (bm25).
+    Cada video se reindexa entero al volver a transcribirlo, así que el índice se mantiene
+    de forma incremental sin reconstruirlo.
+    """
+
+    def __init__(self, db_path: str = INDICE_DB_PATH):
+        self.db_path = db_path
+        self._crear_tablas()
+
+    def _conectar(self):
+        return conectar(self.db_path)
+
+    def _transaccion(self):
+        return transaccion(self.db_path)
+
+    def _crear_tablas(self):
+        """
+        Los segmentos se guardan en una tabla normal y la tabla FTS5 indexa su texto
+        (contenido externo), mantenida con triggers.
+        """
+        conn = self._conectar()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY NOT NULL,
+                    titulo TEXT,
+                    transcription_path TEXT,
+                    mtime REAL,
+                    actualizado REAL
+                );
+                CREATE TABLE IF NOT EXISTS segmentos (
+                    id INTEGER PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    inicio REAL,
+                    fin REAL,
+                    texto TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_segmentos_video ON segmentos (video_id);
+                CREATE VIRTUAL TABLE IF NOT EXISTS segmentos_fts USING fts5(
+                    texto, content='segmentos', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS segmentos_ai AFTER INSERT ON segmentos BEGIN
+                    INSERT INTO segmentos_fts (rowid, texto) VALUES (new.id, new.texto);
+                END;
+                CREATE TRIGGER IF NOT EXISTS segmentos_ad AFTER DELETE ON segmentos BEGIN
+                    INSERT INTO segmentos_fts (segmentos_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+                END;
+                """
+            )
+        finally:
+            conn.close()
+
+    def indexar(self, video_id, segmentos, titulo=None, transcription_path=None):
+        """
+        Sustituye los segmentos indexados del video por `segmentos`, una lista de
+        tuplas (inicio, fin, texto) con los tiempos en segundos (o None si no se conocen).
+        """
+        mtime = os.path.getmtime(transcription_path) if transcription_path and os.path.exists(transcription_path) else None
+        with self._transaccion() as conn:
+            conn.execute("DELETE FROM segmentos WHERE video_id = ?", (video_id,))
+            conn.executemany(
+                "INSERT INTO segmentos (video_id, inicio, fin, texto) VALUES (?, ?, ?, ?)",
+                [(video_id, inicio, fin, texto) for inicio, fin, texto in segmentos if texto and texto.strip()],
+            )
+            conn.execute(
+                """
+                INSERT INTO videos (video_id, titulo, transcription_path, mtime, actualizado) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (video_id) DO UPDATE SET titulo = excluded.titulo, transcription_path = excluded.transcription_path,
+                    mtime = excluded.mtime, actualizado = excluded.actualizado
+                """,
+                (video_id, titulo, transcription_path, mtime, time.time()),
+            )
+
+    def indexar_archivo(self, video_id, transcription_path, titulo=None):
+        """
+        Indexa una transcripción ya escrita en disco, una fila por línea (cada línea es un
+        segmento de Whisper o un bloque de subtítulos). No tiene marcas de tiempo.
+        """
+        with open(transcription_path, "r", encoding="utf-8") as f:
+            segmentos = [(None, None, linea.strip()) for linea in f]
+        self.indexar(video_id, segmentos, titulo=titulo, transcription_path=transcription_path)
+
+    def actualizar_desde_registro(self, registro):
+        """
+        Indexa las transcripciones del registro que faltan en el índice o que han cambiado en disco.
+        Devuelve cuántas se han indexado.
+        """
+        conn = self._conectar()
+        try:
+            indexados = {fila["video_id"]: fila for fila in conn.execute("SELECT video_id, transcription_path, mtime FROM videos")}
+        finally:
+            conn.close()
+
+        nuevos = 0
+        for info in registro.listar():
+            ruta = info.get("transcription_path")
+            if not ruta or not os.path.exists(ruta):
+                continue
+            anterior = indexados.get(info["video_id"])
+            if anterior and anterior["transcription_path"] == ruta and anterior["mtime"] == os.path.getmtime(ruta):
+                continue
+            self.indexar_archivo(info["video_id"], ruta, titulo=info.get("titulo"))
+            nuevos += 1
+        return nuevos
+
+    def buscar(self, consulta, limite=RESULTADOS_POR_DEFECTO, literal=True):
+        """
+        Busca en las transcripciones y devuelve los segmentos más relevantes con su video,
+        marcas de tiempo y un fragmento con las coincidencias entre corchetes.
+        Con `literal=False` la consulta se pasa tal cual a FTS5 (OR, NEAR, prefijos con *...).
+        """
+        if literal:
+            consulta = _consulta_literal(consulta)
+        if not consulta:
+            return []
+        conn = self._conectar()
+        try:
+            filas = conn.execute(
+                f"""
+                SELECT s.video_id, v.titulo, s.inicio, s.fin,
+                       snippet(segmentos_fts, 0, '[', ']', '…', {PALABRAS_FRAGMENTO}) AS fragmento,
+                       bm25(segmentos_fts) AS puntuacion
+                FROM segmentos_fts
+                JOIN segmentos s ON s.id = segmentos_fts.rowid
+                LEFT JOIN videos v ON v.video_id = s.video_id
+                WHERE segmentos_fts MATCH ?
+                ORDER BY puntuacion
+                LIMIT ?
+                """,
+                (consulta, limite),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            # Errores de sintaxis de la consulta FTS5 (solo posibles con literal=False)
+            raise ValueError(f"Consulta no válida: {e}") from e
+        finally:
+            conn.close()
+        return [dict(fila) for fila in filas]
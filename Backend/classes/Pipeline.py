@@ -0,0 +1,260 @@
+import queue
+import threading
+import time
+
+from classes.Registro import Registro
+from Metricas import span
+from classes.YouTube import YouTube, extraer_id_de_url, ARTEFACTOS_POR_DEFECTO, RESOLUCIONES_MINIATURA
+
+
+# Tamaño de las colas entre etapas y número de hilos por etapa
+TAM_COLA = 4
+WORKERS_POR_ETAPA = 2
+
+# Las miniaturas son peticiones pequeñas que pasan casi todo el tiempo esperando a la red,
+# así que su etapa tiene más hilos para descargar varias a la vez
+WORKERS_MINIATURAS = 8
+
+
+def expandir_urls(url):
+    """
+    Convierte una URL de playlist o canal en la lista de URLs de sus videos.
+    Las URLs de un solo video se devuelven tal cual, sin llamar al extractor.
+    """
+    if "list=" not in url and extraer_id_de_url(url):
+        return [url]
+
+    import yt_dlp
+    ydl_opts = {'extract_flat': 'in_playlist', 'quiet': True}
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info_dict = ydl.extract_info(url, download=False)
+
+    if info_dict.get('_type') not in ('playlist', 'multi_video'):
+        return [info_dict.get('webpage_url', url)]
+
+    urls = []
+    for entrada in info_dict.get('entries') or []:
+        if not entrada:
+            continue
+        # Los canales devuelven sus pestañas (Videos, Shorts...) como playlists anidadas
+        if entrada.get('ie_key') == 'YoutubeTab' or entrada.get('_type') == 'playlist':
+            urls.extend(expandir_urls(entrada['url']))
+        elif entrada.get('id'):
+            urls.append(f"https://www.youtube.com/watch?v={entrada['id']}")
+    return urls
+
+
+def leer_urls(path):
+    """
+    Lee un archivo con una URL por línea, ignorando líneas vacías y comentarios (#).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [linea.strip() for linea in f if linea.strip() and not linea.strip().startswith("#")]
+
+
+class Etapa:
+    """
+    Una etapa del pipeline: la función a ejecutar sobre cada video, cuántos hilos la atienden
+    y cómo saber, mirando el registro, si el trabajo ya estaba hecho.
+    """
+
+    def __init__(self, nombre, funcion, workers=WORKERS_POR_ETAPA, hecho=None):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.workers = workers
+        self.hecho = hecho or (lambda info: False)
+
+        # Estadísticas de la etapa
+        self.procesados = 0
+        self.saltados = 0
+        self.errores = 0
+        self.tiempo_ocupado = 0.0
+        self.inicio = None
+        self.fin = None
+
+
+def artefactos_hechos(info, artefactos):
+    """
+    Indica si todos los artefactos (tipo, formato) ya están en el registro del video.
+    """
+    registrados = dict(info.get("artefactos") or {})
+    # Entradas anteriores a `artefactos`: solo tenían el resumen en Markdown en path_resumen
+    if (info.get("path_resumen") or "").endswith(".md"):
+        registrados.setdefault("resumen.markdown", info["path_resumen"])
+    return all(f"{tipo}.{formato.lower()}" in registrados for tipo, formato in artefactos)
+
+
+def etapas_por_defecto(solo_audio=False, workers=WORKERS_POR_ETAPA, workers_miniaturas=WORKERS_MINIATURAS, artefactos=None):
+    """
+    Etapas del procesado completo de un video: descarga, miniatura, transcripción y generación
+    de artefactos (por defecto, el resumen en Markdown).
+    La miniatura solo necesita el título, así que va justo después de la descarga. Solo se da
+    por hecha en la resolución máxima: si no, se vuelve a pedir (con una petición condicional
+    para la que ya se tiene) por si YouTube ya ha generado una mayor.
+    """
+    artefactos = artefactos or ARTEFACTOS_POR_DEFECTO
+    return [
+        Etapa("descarga", lambda yt: yt.descargar_medios(solo_audio=solo_audio), workers,
+              lambda info: info.get("path_mp3") and (solo_audio or info.get("path_video"))),
+        Etapa("thumbnail", lambda yt: yt.descargar_thumbnail(), workers_miniaturas,
+              lambda info: info.get("path_thumbnail") and (info.get("miniatura") or {}).get("resolucion") == RESOLUCIONES_MINIATURA[0]),
+        Etapa("transcripcion", lambda yt: yt.transcribir_audio(), workers,
+              lambda info: info.get("transcription_path")),
+        Etapa("artefactos", lambda yt: yt.generar_artefactos(artefactos), workers,
+              lambda info: artefactos_hechos(info, artefactos)),
+    ]
+
+
+class Pipeline:
+    """
+    Procesa varios videos a la vez encadenando las etapas con colas acotadas.
+    Cada etapa tiene sus propios hilos, así que mientras un video se transcribe
+    el siguiente ya se puede estar descargando.
+    """
+
+    def __init__(self, etapas=None, tam_cola: int = TAM_COLA, registro: Registro = None, al_terminar=None, **opciones_youtube):
+        self.etapas = etapas or etapas_por_defecto()
+        self.registro = registro or Registro()
+        # Se llama como al_terminar(yt, error) cuando un video sale del pipeline, con error=None si no falló
+        self.al_terminar = al_terminar
+        self.opciones_youtube = opciones_youtube
+        self.colas = [queue.Queue(maxsize=tam_cola) for _ in self.etapas]
+        self._hilos = []
+        self._activos = [etapa.workers for etapa in self.etapas]
+        self._lock = threading.Lock()
+        self.inicio = None
+
+    def iniciar(self):
+        """
+        Arranca los hilos de todas las etapas.
+        """
+        self.inicio = time.time()
+        for indice, etapa in enumerate(self.etapas):
+            for n in range(etapa.workers):
+                hilo = threading.Thread(target=self._worker, args=(indice,), name=f"{etapa.nombre}-{n}", daemon=True)
+                hilo.start()
+                self._hilos.append(hilo)
+
+    def enviar(self, url):
+        """
+        Añade un video al pipeline. Se bloquea si la primera cola está llena.
+        """
+        yt = YouTube(url=url, registro=self.registro, **self.opciones_youtube)
+        self.colas[0].put(yt)
+
+    def esperar(self):
+        """
+        Cierra la entrada del pipeline y espera a que todos los videos pasen por todas las etapas.
+        """
+        for _ in range(self.etapas[0].workers):
+            self.colas[0].put(None)
+        for hilo in self._hilos:
+            hilo.join()
+
+    def procesar(self, urls):
+        """
+        Procesa una lista de URLs completa y devuelve el informe de rendimiento.
+        """
+        self.iniciar()
+        for url in urls:
+            self.enviar(url)
+        self.esperar()
+        return self.informe()
+
+    def _worker(self, indice):
+        etapa = self.etapas[indice]
+        cola = self.colas[indice]
+        siguiente = self.colas[indice + 1] if indice + 1 < len(self.etapas) else None
+
+        try:
+            while True:
+                yt = cola.get()
+                if yt is None:
+                    break
+                try:
+                    self._procesar(etapa, yt, siguiente)
+                except Exception as e:
+                    # Fallos fuera de la propia etapa (registro ocupado...): el video se descarta,
+                    # pero el hilo sigue para que la etapa siempre llegue a cerrar la siguiente
+                    print(f"Error inesperado en la etapa '{etapa.nombre}' para {yt.url}: {e}")
+                    with self._lock:
+                        etapa.errores += 1
+                    self._notificar(yt, e)
+        finally:
+            # El último hilo de la etapa en terminar cierra la siguiente
+            with self._lock:
+                self._activos[indice] -= 1
+                ultimo = self._activos[indice] == 0
+                if ultimo:
+                    etapa.fin = etapa.fin or time.time()
+            if ultimo and siguiente is not None:
+                for _ in range(self.etapas[indice + 1].workers):
+                    siguiente.put(None)
+
+    def _procesar(self, etapa, yt, siguiente):
+        with self._lock:
+            if etapa.inicio is None:
+                etapa.inicio = time.time()
+
+        info = self.registro.obtener(yt.video_id) or {}
+        if etapa.hecho(info):
+            with self._lock:
+                etapa.saltados += 1
+        else:
+            inicio = time.time()
+            try:
+                with span(f"etapa.{etapa.nombre}", video_id=yt.video_id):
+                    etapa.funcion(yt)
+            except Exception as e:
+                # Un video que falla no pasa a las siguientes etapas, pero no para el resto
+                print(f"Error en la etapa '{etapa.nombre}' para {yt.url}: {e}")
+                with self._lock:
+                    etapa.errores += 1
+                    etapa.tiempo_ocupado += time.time() - inicio
+                try:
+                    self.registro.actualizar(yt.video_id, url=yt.url, error=f"{etapa.nombre}: {e}")
+                except Exception as e_registro:
+                    print(f"No se pudo guardar el error de {yt.url} en el registro: {e_registro}")
+                self._notificar(yt, e)
+                return
+            with self._lock:
+                etapa.procesados += 1
+                etapa.tiempo_ocupado += time.time() - inicio
+                etapa.fin = time.time()
+
+        if siguiente is not None:
+            siguiente.put(yt)
+        else:
+            self._notificar(yt, None)
+
+    def _notificar(self, yt, error):
+        if not self.al_terminar:
+            return
+        try:
+            self.al_terminar(yt, error)
+        except Exception as e:
+            print(f"Error al notificar el final de {yt.url}: {e}")
+
+    def informe(self):
+        """
+        Devuelve las estadísticas de cada etapa y las imprime como tabla.
+        """
+        total = time.time() - self.inicio if self.inicio else 0.0
+        filas = []
+        for etapa in self.etapas:
+            activo = (etapa.fin - etapa.inicio) if etapa.inicio and etapa.fin else 0.0
+            filas.append({
+                "etapa": etapa.nombre,
+                "procesados": etapa.procesados,
+                "saltados": etapa.saltados,
+                "errores": etapa.errores,
+                "tiempo_medio_s": etapa.tiempo_ocupado / etapa.procesados if etapa.procesados else 0.0,
+                "videos_por_hora": etapa.procesados * 3600 / activo if activo else 0.0,
+            })
+
+        print(f"{'Etapa':<15}{'Procesados':>11}{'Saltados':>10}{'Errores':>9}{'Media (s)':>11}{'Videos/h':>10}")
+        for fila in filas:
+            print(f"{fila['etapa']:<15}{fila['procesados']:>11}{fila['saltados']:>10}{fila['errores']:>9}"
+                  f"{fila['tiempo_medio_s']:>11.1f}{fila['videos_por_hora']:>10.1f}")
+        print(f"Tiempo total: {total:.1f}s")
+        return filas
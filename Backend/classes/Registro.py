@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+import time
+
+from BaseDatos import conectar, transaccion
+
+
+# Base de datos del registro y archivo JSON antiguo del que se migra la primera vez
+REGISTRO_DB_PATH = "registro_videos.db"
+REGISTRO_JSON_PATH = "registro_videos.json"
+
+# Campos con columna propia; cualquier otro campo se guarda en la columna JSON `extra`
+COLUMNAS = (
+    "url",
+    "titulo",
+    "path_mp3",
+    "path_video",
+    "transcription_path",
+    "path_thumbnail",
+    "path_resumen",
+    "path_articulo",
+    "estado",
+)
+
+# Estado que se deduce de los campos de las entradas antiguas, de la etapa más avanzada a la primera
+ESTADOS_POR_CAMPO = (
+    ("path_articulo", "articulo"),
+    ("path_resumen", "resumen"),
+    ("transcription_path", "transcripcion"),
+    ("path_thumbnail", "thumbnail"),
+    ("path_video", "video"),
+    ("path_mp3", "mp3"),
+)
+
+
+class Registro:
+    """
+    Registro de los videos procesados en una base de datos SQLite.
+    Cada etapa actualiza solo sus campos (upsert por video_id) dentro de una transacción,
+    así que varios procesos pueden escribir a la vez sin pisarse.
+
+    Con `en_memoria=True` el registro se lee entero una vez y las consultas se responden
+    desde memoria; las escrituras van a la base de datos y a la copia en memoria. Pensado
+    para procesos de larga duración que son los únicos que escriben en el registro.
+
+    Con `solo_lectura=True` la base de datos se abre sin crearla, migrarla ni escribir en ella,
+    y si no existe se lanza FileNotFoundError.
+    """
+
+    def __init__(self, db_path: str = REGISTRO_DB_PATH, json_path: str = REGISTRO_JSON_PATH, en_memoria: bool = False, solo_lectura: bool = False):
+        self.db_path = db_path
+        self.solo_lectura = solo_lectura
+        self._memoria = None
+        self._lock_memoria = threading.Lock()
+        if solo_lectura:
+            if not os.path.exists(db_path):
+                raise FileNotFoundError(f"No existe el registro {os.path.abspath(db_path)}")
+        else:
+            self._crear_tablas()
+            self.migrar_json(json_path)
+        if en_memoria:
+            self._memoria = {info["video_id"]: info for info in self.listar()}
+
+    def _conectar(self):
+        return conectar(self.db_path, solo_lectura=self.solo_lectura)
+
+    def _transaccion(self):
+        return transaccion(self.db_path)
+
+    def _crear_tablas(self):
+        """
+        Crea las tablas e índices si no existen y activa el modo WAL,
+        que permite leer mientras otro proceso escribe.
+        """
+        conn = self._conectar()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columnas = ", ".join(f"{columna} TEXT" for columna in COLUMNAS)
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY NOT NULL,
+                    {columnas},
+                    extra TEXT NOT NULL DEFAULT '{{}}',
+                    actualizado REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_estado ON videos (estado)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        finally:
+            conn.close()
+
+    def _fila_a_dict(self, fila):
+        datos = json.loads(fila["extra"] or "{}")
+        datos.update({clave: fila[clave] for clave in fila.keys() if clave != "extra"})
+        return datos
+
+    def _actualizar(self, conn, video_id, campos):
+        """
+        Inserta o actualiza solo los campos indicados del video, dentro de una transacción abierta.
+        """
+        columnas = {clave: valor for clave, valor in campos.items() if clave in COLUMNAS}
+        extra = {clave: valor for clave, valor in campos.items() if clave not in COLUMNAS and clave != "video_id"}
+
+        fila = conn.execute("SELECT extra FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        if fila is None:
+            conn.execute("INSERT INTO videos (video_id, extra) VALUES (?, '{}')", (video_id,))
+            extra_actual = {}
+        else:
+            extra_actual = json.loads(fila["extra"] or "{}")
+        extra_actual.update(extra)
+
+        asignaciones = [f"{columna} = ?" for columna in columnas] + ["extra = ?", "actualizado = ?"]
+        valores = list(columnas.values()) + [json.dumps(extra_actual, ensure_ascii=False), time.time(), video_id]
+        conn.execute(f"UPDATE videos SET {', '.join(asignaciones)} WHERE video_id = ?", valores)
+
+    def obtener(self, video_id):
+        """
+        Devuelve los datos registrados del video como diccionario, o None si no está registrado.
+        """
+        if not video_id:
+            return None
+        if self._memoria is not None:
+            with self._lock_memoria:
+                info = self._memoria.get(video_id)
+            return dict(info) if info else None
+        conn = self._conectar()
+        try:
+            fila = conn.execute("SELECT * FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._fila_a_dict(fila) if fila else None
+
+    def actualizar(self, video_id, **campos):
+        """
+        Guarda los campos indicados del video sin tocar el resto de su entrada.
+        """
+        self._guardar(video_id, campos)
+
+    def registrar_artefactos(self, video_id, artefactos, **campos):
+        """
+        Añade `artefactos` ({"tipo.formato": ruta}) al mapa de artefactos del video y guarda `campos`.
+        El mapa se lee y se escribe en la misma transacción, así que dos procesos que generan
+        artefactos del mismo video no se borran las entradas.
+        """
+        self._guardar(video_id, campos, artefactos)
+
+    def _guardar(self, video_id, campos, artefactos=None):
+        if not video_id:
+            print("No se puede actualizar el registro: ID de video no encontrado.")
+            return
+        with self._transaccion() as conn:
+            if artefactos:
+                fila = conn.execute("SELECT extra FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+                registrados = (json.loads(fila["extra"] or "{}").get("artefactos") or {}) if fila else {}
+                campos = {**campos, "artefactos": {**registrados, **artefactos}}
+            self._actualizar(conn, video_id, campos)
+            if self._memoria is not None:
+                fila = conn.execute("SELECT * FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        # La copia en memoria se actualiza solo cuando la transacción ya se ha confirmado
+        if self._memoria is not None:
+            with self._lock_memoria:
+                self._memoria[video_id] = self._fila_a_dict(fila)
+
+    def listar(self, estado=None):
+        """
+        Devuelve todos los videos registrados, opcionalmente filtrados por estado.
+        """
+        if self._memoria is not None:
+            with self._lock_memoria:
+                videos = [dict(info) for info in self._memoria.values() if not estado or info.get("estado") == estado]
+            return sorted(videos, key=lambda info: info.get("actualizado") or 0, reverse=True)
+        conn = self._conectar()
+        try:
+            if estado:
+                filas = conn.execute("SELECT * FROM videos WHERE estado = ? ORDER BY actualizado DESC", (estado,)).fetchall()
+            else:
+                filas = conn.execute("SELECT * FROM videos ORDER BY actualizado DESC").fetchall()
+        finally:
+            conn.close()
+        return [self._fila_a_dict(fila) for fila in filas]
+
+    def migrar_json(self, json_path=REGISTRO_JSON_PATH):
+        """
+        Importa una sola vez el registro antiguo en JSON y lo renombra a `.migrado`.
+        """
+        if not json_path or not os.path.exists(json_path):
+            return
+
+        with self._transaccion() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE clave = 'migrado_json'").fetchone():
+                return
+            with open(json_path, "r", encoding="utf-8") as f:
+                registro_json = json.load(f)
+            for video_id, info in registro_json.items():
+                if video_id and video_id != "null":
+                    if not info.get("estado"):
+                        # El JSON no guardaba el estado: se toma el de la etapa más avanzada hecha
+                        estado = next((estado for campo, estado in ESTADOS_POR_CAMPO if info.get(campo)), None)
+                        info = {**info, "estado": estado}
+                    self._actualizar(conn, video_id, info)
+            conn.execute("INSERT INTO meta (clave, valor) VALUES ('migrado_json', ?)", (str(time.time()),))
+
+        os.replace(json_path, f"{json_path}.migrado")
+        print(f"Registro migrado desde {json_path}: {len(registro_json)} videos.")
@@ -0,0 +1,217 @@
+import json
+import queue
+import re
+import threading
+import time
+import uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import Gpt
+from Http import obtener_sesion
+from classes.Registro import Registro
+from classes.YouTube import extraer_id_de_url
+from classes.Pipeline import Pipeline, etapas_por_defecto, expandir_urls, TAM_COLA
+
+
+# Dirección en la que escucha el servicio. Solo local: la API no tiene autenticación
+HOST_SERVICIO = "127.0.0.1"
+PUERTO_SERVICIO = 8765
+
+# Campos del registro que se devuelven como artefactos de un trabajo, además de los
+# generados a partir de la transcripción (mapa `artefactos`, p. ej. "articulo.html")
+ARTEFACTOS = ("path_mp3", "path_video", "transcription_path", "path_thumbnail", "path_resumen", "path_articulo")
+
+
+class Trabajo:
+    """
+    Un video enviado al servicio y su estado: en_cola, procesando, completado o error.
+    """
+
+    def __init__(self, url, video_id):
+        self.id = uuid.uuid4().hex[:12]
+        self.url = url
+        self.video_id = video_id
+        self.estado = "en_cola"
+        self.error = None
+        self.creado = time.time()
+        self.terminado = None
+
+    def a_dict(self):
+        return {
+            "id": self.id,
+            "url": self.url,
+            "video_id": self.video_id,
+            "estado": self.estado,
+            "error": self.error,
+            "creado": self.creado,
+            "terminado": self.terminado,
+        }
+
+
+class Servicio:
+    """
+    Proceso de larga duración que recibe videos por HTTP y los procesa con un único pipeline.
+    El registro (en memoria), la sesión HTTP, el cliente de OpenAI y las librerías pesadas
+    se cargan una vez al arrancar y se reutilizan en todos los trabajos.
+    Los trabajos se deduplican por video_id: mientras un video está en cola o procesándose,
+    enviarlo otra vez devuelve el trabajo existente.
+    """
+
+    def __init__(self, etapas=None, tam_cola: int = TAM_COLA, registro: Registro = None, **opciones_youtube):
+        self.registro = registro or Registro(en_memoria=True)
+        self.pipeline = Pipeline(etapas=etapas or etapas_por_defecto(), tam_cola=tam_cola, registro=self.registro,
+                                 al_terminar=self._al_terminar, **opciones_youtube)
+        self.trabajos = {}
+        self._activos = {}  # video_id -> trabajo en cola o procesándose
+        self._pendientes = queue.Queue()
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._despachador = threading.Thread(target=self._despachar, name="despachador", daemon=True)
+
+    def iniciar(self):
+        """
+        Precarga los clientes y arranca el pipeline y el hilo que le va pasando los trabajos.
+        """
+        import yt_dlp  # noqa: F401 (se importa ya para que el primer trabajo no pague la importación)
+        obtener_sesion()
+        Gpt.obtener_cliente()
+        self.pipeline.iniciar()
+        self._despachador.start()
+
+    def enviar(self, url):
+        """
+        Añade los videos de una URL (video, playlist o canal) y devuelve sus trabajos.
+        """
+        try:
+            urls = expandir_urls(url)
+        except Exception as e:
+            raise ValueError(f"No se pudo leer la URL {url}: {e}") from e
+
+        trabajos = []
+        for url_video in urls:
+            video_id = extraer_id_de_url(url_video)
+            if not video_id:
+                raise ValueError(f"URL de video no válida: {url_video}")
+            with self._lock:
+                trabajo = self._activos.get(video_id)
+                if trabajo is None:
+                    trabajo = Trabajo(url_video, video_id)
+                    self.trabajos[trabajo.id] = trabajo
+                    self._activos[video_id] = trabajo
+                    self._pendientes.put(trabajo)
+            trabajos.append(trabajo)
+        return trabajos
+
+    def _despachar(self):
+        # Pipeline.enviar se bloquea si la primera cola está llena; así no se bloquean las peticiones HTTP
+        while True:
+            trabajo = self._pendientes.get()
+            if trabajo is None:
+                break
+            with self._lock:
+                trabajo.estado = "procesando"
+            self.pipeline.enviar(trabajo.url)
+
+    def _al_terminar(self, yt, error):
+        with self._lock:
+            trabajo = self._activos.pop(yt.video_id, None)
+            if trabajo is None:
+                return
+            trabajo.estado = "error" if error else "completado"
+            trabajo.error = str(error) if error else None
+            trabajo.terminado = time.time()
+
+    def consultar(self, trabajo_id):
+        """
+        Devuelve el estado de un trabajo junto con las rutas de sus artefactos, o None si no existe.
+        """
+        with self._lock:
+            trabajo = self.trabajos.get(trabajo_id)
+            datos = trabajo.a_dict() if trabajo else None
+        if datos is None:
+            return None
+        info = self.registro.obtener(datos["video_id"]) or {}
+        datos["titulo"] = info.get("titulo")
+        datos["artefactos"] = {campo: info.get(campo) for campo in ARTEFACTOS if info.get(campo)}
+        datos["artefactos"].update(info.get("artefactos") or {})
+        return datos
+
+    def listar(self):
+        with self._lock:
+            return [trabajo.a_dict() for trabajo in sorted(self.trabajos.values(), key=lambda t: t.creado)]
+
+    def servir(self, host=HOST_SERVICIO, puerto=PUERTO_SERVICIO):
+        """
+        Atiende la API HTTP hasta que se interrumpe el proceso, y después deja terminar
+        los trabajos que ya estaban en el pipeline.
+        """
+        self.iniciar()
+        self._servidor = ThreadingHTTPServer((host, puerto), _manejador(self))
+        print(f"Servicio escuchando en http://{host}:{self._servidor.server_port}")
+        try:
+            self._servidor.serve_forever()
+        except KeyboardInterrupt:
+            print("Deteniendo el servicio. Esperando a los trabajos en curso...")
+        finally:
+            self._servidor.server_close()
+            self.detener()
+
+    def detener(self):
+        """
+        Deja de aceptar trabajos y espera a que se procesen todos los que ya estaban en cola.
+        """
+        self._pendientes.put(None)
+        self._despachador.join()
+        self.pipeline.esperar()
+
+
+def _manejador(servicio):
+    """
+    API HTTP del servicio:
+      POST /jobs        {"url": "..."}  encola los videos de la URL
+      GET  /jobs                        lista los trabajos
+      GET  /jobs/<id>                   estado y artefactos de un trabajo
+    """
+
+    class Manejador(BaseHTTPRequestHandler):
+        def log_message(self, formato, *args):
+            pass
+
+        def _responder(self, status, cuerpo):
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/jobs":
+                self._responder(200, {"trabajos": servicio.listar()})
+                return
+            coincidencia = re.fullmatch(r"/jobs/([0-9a-f]+)/?", self.path)
+            datos = servicio.consultar(coincidencia.group(1)) if coincidencia else None
+            if datos is None:
+                self._responder(404, {"error": "Trabajo no encontrado"})
+            else:
+                self._responder(200, datos)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                self._responder(404, {"error": "Ruta no encontrada"})
+                return
+            try:
+                peticion = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                url = peticion.get("url")
+                if not url:
+                    raise ValueError("Falta el campo 'url'")
+                trabajos = servicio.enviar(url)
+            except ValueError as e:
+                self._responder(400, {"error": str(e)})
+                return
+            except Exception as e:
+                self._responder(500, {"error": str(e)})
+                return
+            self._responder(202, {"trabajos": [trabajo.a_dict() for trabajo in trabajos]})
+
+    return Manejador
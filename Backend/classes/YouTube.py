@@ -1,50 +1,191 @@
-import yt_dlp
 import re
 import os
 import json
-from pydub import AudioSegment
-from Gpt import transcribe_audio,get_response_from_openai
-import requests
+import shutil
+import time
+import copy
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from Audio import generar_segmentos, extraer_audio
+from Subtitulos import elegir_subtitulos, descargar_subtitulos
+from Gpt import transcribe_audio_async,ejecutar_async,get_response_from_openai_async,stream_response_from_openai_async,estimar_tokens,dividir_por_tokens
+from classes.Registro import Registro
+from classes.Indice import IndiceBusqueda
+from Http import obtener_sesion, TIMEOUT_S
+from Metricas import span
+
+
+
+
+# Caché en disco de los metadatos de cada video (info_dict de yt_dlp), por video_id.
+# Las URLs de descarga de YouTube caducan a las pocas horas, así que el TTL por defecto es menor.
+CACHE_INFO_DIR = os.path.join("data", ".cache", "info")
+CACHE_INFO_TTL_S = 3 * 60 * 60
+
+# Número de segmentos que se transcriben a la vez. Los reintentos y los límites de OpenAI
+# son los del cliente compartido de Gpt, comunes a todos los videos
+MAX_CONCURRENCIA_TRANSCRIPCION = 4
+
+# Duración máxima de cada segmento de audio que se envía a transcribir y perfil de codificación.
+# El tamaño real de cada segmento lo limita además el máximo de bytes que acepta la API.
+DURACION_MAXIMA_SEGMENTO_S = 10 * 60
+PERFIL_AUDIO_TRANSCRIPCION = "transcripcion"
+
+# Presupuesto de tokens por fragmento al resumir transcripciones largas por partes (map-reduce)
+TOKENS_POR_FRAGMENTO = 12000
+
+# Idiomas de subtítulos que se prueban, por orden, antes de transcribir con Whisper
+IDIOMAS_SUBTITULOS = ["es", "en"]
+
+# Miniaturas: URL y resoluciones que se prueban por orden si la anterior no existe
+URL_MINIATURA = "https://img.youtube.com/vi/{video_id}/{resolucion}.jpg"
+RESOLUCIONES_MINIATURA = ("maxresdefault", "sddefault", "hqdefault")
+
+
+def extraer_id_de_url(url):
+    """
+    Extrae el ID del video desde una URL de YouTube.
+    Maneja varios formatos comunes de URL.
+    """
+    # Expresiones regulares para diferentes formatos de URL
+    patrones = [
+        r"v=([a-zA-Z0-9_-]{11})",            # URL con parámetro v=ID
+        r"youtu\.be/([a-zA-Z0-9_-]{11})",    # URL corta de youtu.be
+        r"youtube\.com/embed/([a-zA-Z0-9_-]{11})",  # URL embed
+    ]
+
+    for patron in patrones:
+        match = re.search(patron, url)
+        if match:
+            return match.group(1)
+
+    return None  # En caso de que no se encuentre un ID válido
+
+
+def prompt_resumen(idioma="Castellano", formato="Markdown"):
+    """
+    Prompt de sistema para el resumen del video.
+    """
+    return f"""
+            Generate a summary from the transcription of a video, including a detailed introduction, explanation of key points, and a final conclusion. 
 
+            Use the following guidelines for the summary:
 
+            - Write in the specified language `{idioma}`.
+            - Maintain a formal tone throughout the text.
+            - Begin with a compelling introduction that presents the topic of the video and encourages the reader to continue reading.
+            - Clearly explain the key points, detailing significant information in an organized and comprehensible manner.
+            - Conclude with a final summary that succinctly encapsulates the key points to leave the audience with a clear understanding of the main message.
 
+            # Output Format
 
-# Definir la ruta del archivo JSON de registro
-REGISTRO_PATH = "registro_videos.json"
+            The summary should have the following structure:
+
+            - **Introduction:** A brief introduction presenting the theme of the video.
+            - **Detailed explanation of key points:** A detailed yet concise discussion of the primary elements of the video.
+            - **Conclusion:** A succinct summary that ties together the main arguments or points of the video.
+
+            The output should be consistent with the following parameters:
+            - Replace `{idioma}` with the correct language (e.g., Spanish, English).
+            - Replace `{formato}` with the suitable format (e.g., plaintext, HTML).
+
+            # Examples
+
+            Input: (Fragment of the transcribed video)
+            "Hoy les traigo una lista de consejos imprescindibles para mejorar la productividad..."
+
+            Output: 
+
+            **Introducción:** En la actualidad, ser productivo se ha vuelto un desafío importante debido a la cantidad de distracciones y el ritmo acelerado del día a día. A continuación, os presento algunos de los mejores consejos para mejorar nuestra productividad.
+
+            **Puntos clave detallados:**
+            1. **Define metas claras:** Es esencial establecer objetivos que sean alcanzables y específicos.
+            2. **Elimina distracciones:** Identifica las fuentes de distracción y toma medidas para reducirlas.
+            3. **Administra tu tiempo adecuadamente:** Utiliza técnicas como la del Pomodoro para dividir tu trabajo en intervalos manejables.
+
+            **Conclusión:** Estos consejos son fundamentales para ayudarte a mejorar tu productividad en el trabajo y en la vida diaria. Pon en práctica estas recomendaciones y notarás una diferencia significativa. Si quieres saber más, no dudes en ver nuestro video completo.
+
+            # Notes
+
+            - Ensure that the explanation of key points balances between detail and brevity.
+            - Adapt tone and language to suit the given `{idioma}` and required `{formato}` to ensure consistency.
+
+    """
+
+
+def prompt_articulo(idioma="Castellano", formato="Markdown"):
+    """
+    Prompt de sistema para el artículo de blog optimizado para SEO.
+    """
+    return f"""
+    Eres un experto en redacción de artículos de blog optimizados para SEO. 
+    A partir del texto proporcionado, que es una transcripción de uno de mis  videos, 
+    debes generar un artículo para mi blog y esté optimizado para motores de búsqueda en tono formal y en primera persona 
+    para poder generar tráfico de mi blog hacia el vídeo.
+    
+    **Instrucciones detalladas:**
+    - Comienza con una introducción que presente el tema del video y atraiga la atención del lector.
+    - Usa subtítulos H2 y H3 para estructurar el contenido y hacerlo escaneable.
+    - Incluye una lista de palabras clave relevantes relacionadas con el tema del video.
+    - Asegúrate de que cada sección esté bien desarrollada y que las palabras clave estén distribuidas naturalmente a lo largo del artículo.
+    - Usa párrafos cortos y sencillos para mejorar la legibilidad.
+    - Incluye una conclusión clara que resuma los puntos clave del artículo.
+    - Optimiza para SEO usando llamadas a la acción (CTA) relevantes, como "Descubre más", "Visita nuestra página", etc.
+    
+    El resultado debe estar en formato {formato} y en el idioma {idioma}.
+    """
+
+
+# Artefactos que se pueden generar a partir de la transcripción: prompt de sistema
+# y campo del registro en el que se guarda la ruta
+TIPOS_ARTEFACTO = {
+    "resumen": {"prompt": prompt_resumen, "campo": "path_resumen"},
+    "articulo": {"prompt": prompt_articulo, "campo": "path_articulo"},
+}
+# Los formatos se guardan siempre en minúsculas; los que no están aquí se escriben como .txt
+EXTENSIONES_FORMATO = {"markdown": ".md", "md": ".md", "html": ".html", "txt": ".txt"}
+ARTEFACTOS_POR_DEFECTO = [("resumen", "markdown")]
+
+
+def parsear_artefactos(texto):
+    """
+    Convierte "resumen:markdown,articulo:html" en [("resumen", "markdown"), ("articulo", "html")].
+    Si no se indica el formato se usa Markdown.
+    """
+    artefactos = []
+    for parte in texto.split(","):
+        if not parte.strip():
+            continue
+        tipo, _, formato = parte.strip().partition(":")
+        if tipo not in TIPOS_ARTEFACTO:
+            raise ValueError(f"Tipo de artefacto desconocido: {tipo} (disponibles: {', '.join(TIPOS_ARTEFACTO)})")
+        artefactos.append((tipo, formato.strip().lower() or "markdown"))
+    return artefactos
 
 
 class YouTube:
-    def __init__(self, ai_model: str = "gpt-4-turbo", url: str = ""):
+    def __init__(self, ai_model: str = "gpt-4-turbo", url: str = "", max_concurrencia: int = MAX_CONCURRENCIA_TRANSCRIPCION, ttl_info: float = CACHE_INFO_TTL_S, registro: Registro = None, idiomas_subtitulos: list = None, indice: IndiceBusqueda = None):
         self.ai_model = ai_model
         self.url = url
+        self.max_concurrencia = max_concurrencia
+        self.ttl_info = ttl_info
+        self.idiomas_subtitulos = idiomas_subtitulos or IDIOMAS_SUBTITULOS
+        self._info_dict = None
         self.path_mp3 = None
         self.path_video = None
         self.transcription_path = None
+        self.path_thumbnail = None
         self.video_id = None  # ID único del video
 
-        # Cargar o inicializar el registro de videos
-        self.registro_videos = self.cargar_registro()
+        # Registro de videos compartido (por defecto, la base de datos SQLite del directorio actual)
+        self.registro = registro or Registro()
+
+        # Índice de búsqueda de las transcripciones; se abre al indexar la primera
+        self.indice = indice
 
         # Si el video ya fue descargado, cargar sus paths desde el registro
         self.verificar_registro()
 
-    def cargar_registro(self):
-        """
-        Carga el registro de videos desde el archivo JSON.
-        """
-        if os.path.exists(REGISTRO_PATH):
-            with open(REGISTRO_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        else:
-            return {}
-
-    def guardar_registro(self):
-        """
-        Guarda el registro de videos en el archivo JSON.
-        """
-        with open(REGISTRO_PATH, "w", encoding="utf-8") as f:
-            json.dump(self.registro_videos, f, ensure_ascii=False, indent=4)
-
     def verificar_registro(self):
         """
         Verifica si el video ya ha sido procesado anteriormente
@@ -52,33 +193,29 @@ class YouTube:
         """
         # Obtener el ID del video desde la URL
         self.video_id = self.extraer_video_id()
-        if self.video_id in self.registro_videos:
-            info = self.registro_videos[self.video_id]
+        info = self.registro.obtener(self.video_id)
+        if info:
             self.path_mp3 = info.get("path_mp3")
             self.path_video = info.get("path_video")
             self.transcription_path = info.get("transcription_path")
             self.path_thumbnail = info.get("path_thumbnail")
             print(f"Video ya procesado. Cargando paths desde el registro: {info}")
 
+    def actualizar_registro(self, estado, **campos):
+        """
+        Guarda en el registro los campos de una etapa y la marca como último estado del video.
+        """
+        self.registro.actualizar(self.video_id, url=self.url, estado=estado, **campos)
+
     def extraer_video_id(self):
         """
         Extrae el ID del video desde la URL de YouTube.
-        Maneja varios formatos comunes de URL.
-        """
-        # Expresiones regulares para diferentes formatos de URL
-        patrones = [
-            r"v=([a-zA-Z0-9_-]{11})",            # URL con parámetro v=ID
-            r"youtu\.be/([a-zA-Z0-9_-]{11})",    # URL corta de youtu.be
-            r"youtube\.com/embed/([a-zA-Z0-9_-]{11})",  # URL embed
-        ]
-        
-        for patron in patrones:
-            match = re.search(patron, self.url)
-            if match:
-                return match.group(1)
-        
-        print("No se pudo extraer el ID del video.")
-        return None  # En caso de que no se encuentre un ID válido
+        """
+        video_id = extraer_id_de_url(self.url)
+        if not video_id:
+            print("No se pudo extraer el ID del video.")
+        return video_id
+
     def eliminar_emojis(self, text):
         """
         Elimina emojis y otros caracteres especiales del texto,
@@ -92,26 +229,117 @@ class YouTube:
         sanitized_text = re.sub(r'\s+', '_', sanitized_text)
         return sanitized_text
 
+    def _ruta_cache_info(self):
+        """
+        Devuelve la ruta del archivo de caché de metadatos del video, o None si no hay video_id.
+        """
+        if not self.video_id:
+            return None
+        return os.path.join(CACHE_INFO_DIR, f"{self.video_id}.json")
+
+    def obtener_info(self, forzar=False):
+        """
+        Devuelve el info_dict del video. Se consulta primero la memoria, después la caché en disco
+        (si no ha caducado) y solo en último lugar se llama al extractor de yt_dlp.
+        Con `forzar=True` siempre se vuelve a extraer.
+        """
+        if self._info_dict is not None and not forzar:
+            return self._info_dict
+
+        ruta_cache = self._ruta_cache_info()
+        if ruta_cache and not forzar and os.path.exists(ruta_cache):
+            with open(ruta_cache, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            if time.time() - cache.get("obtenido", 0) < self.ttl_info:
+                self._info_dict = cache["info"]
+                return self._info_dict
+
+        import yt_dlp
+        with span("extract_info", video_id=self.video_id), yt_dlp.YoutubeDL() as ydl:
+            # Sin las claves de la selección de formatos (requested_formats...), igual que
+            # --write-info-json, para que cada descarga pueda elegir su propio formato
+            self._info_dict = ydl.sanitize_info(ydl.extract_info(self.url, download=False), remove_private_keys=True)
+
+        if ruta_cache:
+            # Escribimos en un archivo temporal y lo renombramos para no dejar cachés a medias
+            os.makedirs(CACHE_INFO_DIR, exist_ok=True)
+            ruta_temporal = f"{ruta_cache}.{os.getpid()}.tmp"
+            with open(ruta_temporal, "w", encoding="utf-8") as f:
+                json.dump({"obtenido": time.time(), "info": self._info_dict}, f, ensure_ascii=False)
+            os.replace(ruta_temporal, ruta_cache)
+        return self._info_dict
+
+    def invalidar_info(self):
+        """
+        Elimina los metadatos del video de la memoria y de la caché en disco.
+        """
+        self._info_dict = None
+        ruta_cache = self._ruta_cache_info()
+        if ruta_cache and os.path.exists(ruta_cache):
+            os.remove(ruta_cache)
+
+    def _ruta_salida(self):
+        """
+        Devuelve la ruta base (sin extensión) de los archivos del video, a partir del título,
+        y crea su carpeta dentro de `data`.
+        """
+        titulo = self.obtener_info().get('title', 'video')
+        titulo_sanitizado = self.eliminar_emojis(titulo)
+        titulo_sanitizado = re.sub(r'[\/:*?"<>|]', '', titulo_sanitizado)
+
+        video_dir = os.path.join('data', titulo_sanitizado)
+        os.makedirs(video_dir, exist_ok=True)
+        return os.path.join(video_dir, titulo_sanitizado)
+
+    def _descargar(self, ydl_opts):
+        """
+        Descarga el video con las opciones indicadas reutilizando los metadatos ya obtenidos,
+        sin volver a llamar al extractor. Si las URLs de la caché han caducado, se
+        invalidan los metadatos y se reintenta una vez con datos nuevos.
+        """
+        with span("descarga", video_id=self.video_id, formato=ydl_opts.get('format')) as medicion:
+            def contar_bytes(estado):
+                if estado.get('status') == 'finished':
+                    medicion.sumar(bytes=estado.get('total_bytes') or estado.get('downloaded_bytes'))
+
+            import yt_dlp
+            ydl_opts = {**ydl_opts, 'progress_hooks': [contar_bytes]}
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                try:
+                    ydl.process_ie_result(copy.deepcopy(self.obtener_info()), download=True)
+                except yt_dlp.utils.DownloadError as e:
+                    print(f"Error descargando con los metadatos en caché ({e}). Volviendo a extraerlos.")
+                    self.invalidar_info()
+                    ydl.process_ie_result(copy.deepcopy(self.obtener_info()), download=True)
+
+    def descargar_medios(self, solo_audio=False):
+        """
+        Obtiene los archivos del video descargando cada stream una sola vez.
+        Si `solo_audio` es True solo se descarga el audio; si no, se descarga el video
+        y el MP3 se extrae en local del archivo de video.
+        """
+        if solo_audio:
+            self.descargar_mp3()
+            return
+        self.descargar_video()
+        self.descargar_mp3()
+
     def descargar_mp3(self):
         """
         Descarga el audio en formato MP3 y guarda la ruta en el registro.
+        Si el video ya está en disco, el MP3 se extrae de él en lugar de descargarlo.
         """
         if self.path_mp3:
             print("El archivo MP3 ya existe. Saltando la descarga.")
             return
 
-        base_dir = 'data'
-        os.makedirs(base_dir, exist_ok=True)
-
-        with yt_dlp.YoutubeDL() as ydl:
-            info_dict = ydl.extract_info(self.url, download=False)
-            titulo = info_dict.get('title', 'audio')
-            titulo_sanitizado = self.eliminar_emojis(titulo)
-            titulo_sanitizado = re.sub(r'[\/:*?"<>|]', '', titulo_sanitizado)
+        output_path = self._ruta_salida()
 
-        video_dir = os.path.join(base_dir, titulo_sanitizado)
-        os.makedirs(video_dir, exist_ok=True)
-        output_path = os.path.join(video_dir, titulo_sanitizado)
+        if self.path_video and os.path.exists(self.path_video):
+            self.path_mp3 = extraer_audio(self.path_video, f"{output_path}.mp3")
+            print(f"Audio extraído del video: {self.path_mp3}")
+            self.actualizar_registro("mp3", path_mp3=self.path_mp3, titulo=self.obtener_info().get('title'))
+            return
 
         ydl_opts = {
             'format': 'bestaudio/best',
@@ -125,15 +353,13 @@ class YouTube:
             ]
         }
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([self.url])
-        
+        self._descargar(ydl_opts)
+
         self.path_mp3 = f"{output_path}.mp3"
         print(f"Descarga completada: {self.path_mp3}")
 
-        # Actualizar el registro y guardar
-        self.registro_videos[self.video_id] = {"path_mp3": self.path_mp3}
-        self.guardar_registro()
+        # Actualizar el registro
+        self.actualizar_registro("mp3", path_mp3=self.path_mp3, titulo=self.obtener_info().get('title'))
 
     def descargar_video(self):
         """
@@ -143,108 +369,225 @@ class YouTube:
             print("El archivo de video ya existe. Saltando la descarga.")
             return
 
-        base_dir = 'data'
-        os.makedirs(base_dir, exist_ok=True)
-
-        with yt_dlp.YoutubeDL() as ydl:
-            info_dict = ydl.extract_info(self.url, download=False)
-            titulo = info_dict.get('title', 'video')
-            titulo_sanitizado = self.eliminar_emojis(titulo)
-            titulo_sanitizado = re.sub(r'[\/:*?"<>|]', '', titulo_sanitizado)
-
-        video_dir = os.path.join(base_dir, titulo_sanitizado)
-        os.makedirs(video_dir, exist_ok=True)
-        output_path = os.path.join(video_dir, titulo_sanitizado)
+        output_path = self._ruta_salida()
 
         ydl_opts = {
             'format': 'bestvideo+bestaudio',
             'outtmpl': output_path,
+            'merge_output_format': 'mp4',
         }
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([self.url])
-        
+        self._descargar(ydl_opts)
+
         self.path_video = f"{output_path}.mp4"
         print(f"Descarga completada: {self.path_video}")
 
-        # Actualizar el registro y guardar
-        self.registro_videos[self.video_id]["path_video"] = self.path_video
-        self.guardar_registro()
+        # Actualizar el registro
+        self.actualizar_registro("video", path_video=self.path_video, titulo=self.obtener_info().get('title'))
 
-    def transcribir_audio(self):
+    def transcribir_subtitulos(self):
         """
-        Transcribe el audio del archivo MP3 y guarda la transcripción en un archivo .txt.
+        Genera la transcripción a partir de los subtítulos de YouTube (manuales o automáticos),
+        probando los idiomas de `idiomas_subtitulos` por orden.
+        Devuelve True si se ha podido, False si hay que transcribir el audio.
+        """
+        try:
+            eleccion = elegir_subtitulos(self.obtener_info(), self.idiomas_subtitulos)
+            if not eleccion:
+                print("No se encontraron subtítulos en YouTube. Procediendo con OpenAI.")
+                return False
+            idioma, automaticos, pista = eleccion
+            with span("subtitulos", video_id=self.video_id, idioma=idioma, formato=pista.get("ext")):
+                bloques = descargar_subtitulos(pista)
+        except Exception as e:
+            print(f"No se pudieron descargar los subtítulos de YouTube: {e}")
+            return False
+
+        if not bloques:
+            print("Los subtítulos de YouTube están vacíos. Procediendo con OpenAI.")
+            return False
+
+        output_path = self._ruta_salida()
+        self.transcription_path = os.path.join(os.path.dirname(output_path), f"transcription_{os.path.basename(output_path)}.txt")
+        with open(self.transcription_path, "w", encoding="utf-8") as f:
+            for _, _, texto in bloques:
+                f.write(texto + "\n")
+
+        tipo = "automáticos" if automaticos else "manuales"
+        print(f"Transcripción obtenida de los subtítulos {tipo} de YouTube ({idioma}): {self.transcription_path}")
+        self.actualizar_registro(
+            "transcripcion",
+            transcription_path=self.transcription_path,
+            fuente_transcripcion="subtitulos",
+            idioma_subtitulos=idioma,
+            subtitulos_automaticos=automaticos,
+        )
+        self.indexar_transcripcion(bloques)
+        return True
+
+    def transcribir_audio(self, perfil_audio=PERFIL_AUDIO_TRANSCRIPCION, duracion_maxima_segmento=DURACION_MAXIMA_SEGMENTO_S, usar_subtitulos=True):
+        """
+        Transcribe el audio del video y guarda la transcripción en un archivo .txt.
+        Si el video tiene subtítulos en alguno de los idiomas configurados se usan directamente;
+        si no, se transcribe con Whisper el MP3 (o el video si no hay MP3). Los segmentos
+        se recodifican con `perfil_audio` (ver Audio.PERFILES_AUDIO) y se cortan en silencios.
         """
         if self.transcription_path:
             print("La transcripción ya existe. Saltando la transcripción.")
             return
-        
-        # Intentar descargar la transcripción automática de YouTube
-        ydl_opts = {
-            'skip_download': True,  # No descargues el video, solo extrae información
-            'writesubtitles': True,  # Intenta obtener subtítulos automáticos
-            'subtitle': 'best',  # Selecciona el mejor idioma disponible
-            'subtitleslangs': ['en'],  # Puedes ajustar el idioma según necesites
-            'outtmpl': os.path.join(os.path.dirname(self.path_mp3), 'temp_subtitles')
-        }
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:  # Aquí usamos yt_dlp.YoutubeDL en lugar de YoutubeDL directamente
-            try:
-                info_dict = ydl.extract_info(self.url, download=False)
-                # Revisar si se descargó algún subtítulo
-                subtitle_files = [f for f in os.listdir(os.path.dirname(self.path_mp3)) if f.startswith("temp_subtitles")]
-                if subtitle_files:
-                    # Renombrar el archivo de subtítulos como la transcripción final
-                    self.transcription_path = os.path.join(os.path.dirname(self.path_mp3), f"transcription_{os.path.basename(self.path_mp3)}.txt")
-                    os.rename(os.path.join(os.path.dirname(self.path_mp3), subtitle_files[0]), self.transcription_path)
-                    print(f"Transcripción automática de YouTube descargada: {self.transcription_path}")
-                    
-                    # Actualizar el registro JSON y salir de la función
-                    if self.video_id not in self.registro_videos:
-                        self.registro_videos[self.video_id] = {}
-                    self.registro_videos[self.video_id]["transcription_path"] = self.transcription_path
-                    self.guardar_registro()
-                    print("--------------------------------")
-                    print("---------TRANSCRIPCION VIDEO----")
-                    print("--------------------------------")
-                    return
-                else:
-                    print("No se encontró transcripción automática en YouTube. Procediendo con OpenAI.")
-            except Exception as e:
-                print(f"No se pudo descargar la transcripción automática de YouTube: {e}")
-
-        # Si no se encontró transcripción automática, proceder con OpenAI
-
-        audio = AudioSegment.from_mp3(self.path_mp3)
-        duration_ms = len(audio)
-        segment_duration_ms = 5 * 60 * 1000  # 5 minutos en milisegundos
-
-        titulo_sanitizado = os.path.splitext(os.path.basename(self.path_mp3))[0]
-        self.transcription_path = os.path.join(os.path.dirname(self.path_mp3), f"transcription_{titulo_sanitizado}.txt")
-
-        full_transcription = ""
-        for i in range(0, duration_ms, segment_duration_ms):
-            segment = audio[i:i + segment_duration_ms]
-            segment_path = os.path.join(os.path.dirname(self.path_mp3), f"temp_segment_{i // segment_duration_ms}.mp3")
-            segment.export(segment_path, format="mp3")
-            
-            transcription_text = transcribe_audio(segment_path)
-            full_transcription += transcription_text + "\n"
-            os.remove(segment_path)
+        # Intentar usar los subtítulos de YouTube, mucho más rápidos (y gratis) que Whisper
+        if usar_subtitulos and self.transcribir_subtitulos():
+            return
 
-        with open(self.transcription_path, "w", encoding="utf-8") as f:
+        # El audio se puede sacar tanto del MP3 como directamente del archivo de video
+        origen_audio = self.path_mp3 or self.path_video
+        if not origen_audio:
+            print("Error: Debes descargar el video o el audio antes de transcribirlo.")
+            return
+
+        # Si no hay subtítulos, proceder con OpenAI
+        titulo_sanitizado = os.path.splitext(os.path.basename(origen_audio))[0]
+        transcription_path = os.path.join(os.path.dirname(origen_audio), f"transcription_{titulo_sanitizado}.txt")
+
+        # Cada segmento transcrito se guarda en disco en cuanto termina. Si una ejecución anterior
+        # se interrumpió, sus segmentos ya transcritos se reutilizan y solo se envían los que faltan.
+        directorio_checkpoints = os.path.join(os.path.dirname(origen_audio), f"segmentos_{titulo_sanitizado}")
+        os.makedirs(directorio_checkpoints, exist_ok=True)
+        checkpoints = self.cargar_checkpoints(directorio_checkpoints, perfil_audio)
+        if checkpoints:
+            print(f"Reanudando la transcripción: {len(checkpoints)} segmentos ya transcritos.")
+
+        # `generar_segmentos` consulta `ya_transcrito` con cada segmento del plan, así que aquí queda el plan completo
+        plan = []
+
+        tiempos = {}
+
+        def ya_transcrito(indice, inicio, fin):
+            plan.append(indice)
+            tiempos[indice] = (inicio, fin)
+            checkpoint = checkpoints.get(indice)
+            return bool(checkpoint) and abs(checkpoint["inicio"] - inicio) < 0.01 and abs(checkpoint["fin"] - fin) < 0.01
+
+        # Los segmentos se extraen del archivo de uno en uno y se envían a transcribir en cuanto están listos.
+        # Como mucho hay `max_concurrencia` segmentos en disco a la vez, así que la memoria no crece con la duración.
+        segmentos = generar_segmentos(origen_audio, os.path.dirname(origen_audio), duracion_maxima_segmento, perfil=perfil_audio, omitir=ya_transcrito)
+        transcripciones = {}
+        max_concurrencia = max(1, self.max_concurrencia)
+        with ThreadPoolExecutor(max_workers=max_concurrencia) as executor:
+            pendientes = {}
+            try:
+                for indice, inicio, fin, segment_path in segmentos:
+                    # Los segmentos omitidos por tener checkpoint no pasan por aquí
+                    checkpoint = {"indice": indice, "inicio": inicio, "fin": fin, "perfil": perfil_audio}
+                    futuro = executor.submit(self._transcribir_y_guardar, segment_path, checkpoint, directorio_checkpoints)
+                    pendientes[futuro] = (indice, segment_path)
+                    if len(pendientes) >= max_concurrencia:
+                        terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                        for futuro in terminados:
+                            transcripciones[pendientes.pop(futuro)[0]] = futuro.result()
+                for futuro in list(pendientes):
+                    transcripciones[pendientes[futuro][0]] = futuro.result()
+                    del pendientes[futuro]
+            finally:
+                # Si algo falla, no dejamos trabajo pendiente en cola ni segmentos en disco
+                for futuro, (indice, segment_path) in pendientes.items():
+                    if futuro.cancel() and os.path.exists(segment_path):
+                        os.remove(segment_path)
+                segmentos.close()
+
+        # Se unen los segmentos del plan en orden, tomando de los checkpoints los que no se han repetido
+        for indice in plan:
+            if indice not in transcripciones:
+                transcripciones[indice] = checkpoints[indice]["texto"]
+        full_transcription = "".join(transcripciones[i] + "\n" for i in plan)
+
+        with open(transcription_path, "w", encoding="utf-8") as f:
             f.write(full_transcription)
+        self.transcription_path = transcription_path
 
         print(f"Transcripción completada: {self.transcription_path}")
 
-        # Actualizar el registro y guardar
-        self.registro_videos[self.video_id]["transcription_path"] = self.transcription_path
-        self.guardar_registro()
+        # Actualizar el registro y eliminar los checkpoints, que ya no hacen falta
+        self.actualizar_registro("transcripcion", transcription_path=self.transcription_path, fuente_transcripcion="whisper", segmentos_transcritos=None)
+        shutil.rmtree(directorio_checkpoints, ignore_errors=True)
+        self.indexar_transcripcion([(*tiempos[i], transcripciones[i]) for i in plan])
+
+    def indexar_transcripcion(self, segmentos):
+        """
+        Añade la transcripción al índice de búsqueda, un segmento (inicio, fin, texto) por fila.
+        Un fallo al indexar no invalida la transcripción, que ya está guardada.
+        """
+        try:
+            with span("indexar", video_id=self.video_id):
+                if self.indice is None:
+                    self.indice = IndiceBusqueda()
+                titulo = (self.registro.obtener(self.video_id) or {}).get("titulo")
+                self.indice.indexar(self.video_id, segmentos, titulo=titulo, transcription_path=self.transcription_path)
+        except Exception as e:
+            print(f"No se pudo indexar la transcripción de {self.video_id}: {e}")
+
+    def cargar_checkpoints(self, directorio, perfil_audio):
+        """
+        Carga los segmentos ya transcritos de una ejecución anterior, indexados por su número.
+        Se descartan los que se hicieron con otro perfil de audio.
+        """
+        checkpoints = {}
+        for nombre in os.listdir(directorio):
+            if not nombre.endswith(".json"):
+                continue
+            with open(os.path.join(directorio, nombre), "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("perfil") == perfil_audio:
+                checkpoints[checkpoint["indice"]] = checkpoint
+        return checkpoints
+
+    def _transcribir_y_guardar(self, segment_path, checkpoint, directorio_checkpoints):
+        """
+        Transcribe un segmento, guarda el resultado como checkpoint y elimina el archivo temporal.
+        """
+        with span("transcribir_segmento", video_id=self.video_id, indice=checkpoint["indice"]) as medicion:
+            medicion.sumar(segundos_audio=checkpoint["fin"] - checkpoint["inicio"])
+            checkpoint["texto"] = self._transcribir_y_borrar(segment_path)
+
+        ruta = os.path.join(directorio_checkpoints, f"segmento_{checkpoint['indice']:04d}.json")
+        with open(f"{ruta}.tmp", "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(f"{ruta}.tmp", ruta)
+
+        completados = len([nombre for nombre in os.listdir(directorio_checkpoints) if nombre.endswith(".json")])
+        self.registro.actualizar(self.video_id, segmentos_transcritos={"directorio": directorio_checkpoints, "completados": completados})
+        return checkpoint["texto"]
+
+    def transcribir_segmento(self, segment_path):
+        """
+        Transcribe un segmento de audio con el cliente compartido, que reparte la cuota entre
+        todos los hilos y reintenta los errores transitorios respetando Retry-After.
+        Si falla lanza la excepción para no dejar huecos en la transcripción.
+        """
+        try:
+            return ejecutar_async(transcribe_audio_async(segment_path))
+        except Exception as e:
+            raise RuntimeError(f"No se pudo transcribir {segment_path}: {e}") from e
+
+    def _transcribir_y_borrar(self, segment_path):
+        """
+        Transcribe un segmento y elimina su archivo temporal, haya ido bien o no.
+        """
+        try:
+            return self.transcribir_segmento(segment_path)
+        finally:
+            if os.path.exists(segment_path):
+                os.remove(segment_path)
 
     def descargar_thumbnail(self):
         """
         Descarga la miniatura del video y la guarda en la carpeta correspondiente
         con el nombre `thumbnail_nombre_del_video.jpg`.
+        Prueba las resoluciones de RESOLUCIONES_MINIATURA por orden y, si ya estaba descargada,
+        pide la misma con una petición condicional para no volver a bajarla si no ha cambiado.
+        Las resoluciones mayores se siguen probando sin condiciones, porque YouTube puede
+        generarlas después de la primera descarga.
         """
         if not self.video_id:
             print("No se pudo descargar la miniatura: ID de video no encontrado.")
@@ -260,170 +603,176 @@ class YouTube:
         base_dir = 'data'
         video_dir = os.path.join(base_dir, titulo_sanitizado)
         os.makedirs(video_dir, exist_ok=True)
-
-        # URL de la miniatura
-        thumbnail_url = f"https://img.youtube.com/vi/{self.video_id}/maxresdefault.jpg"
         thumbnail_path = os.path.join(video_dir, f"thumbnail_{titulo_sanitizado}.jpg")
 
+        # Validadores (ETag / Last-Modified) de la última descarga, si el archivo sigue en disco
+        anterior = (self.registro.obtener(self.video_id) or {}).get("miniatura") or {}
+        if not os.path.exists(thumbnail_path):
+            anterior = {}
+
         # Descargar la miniatura
-        response = requests.get(thumbnail_url)
-        if response.status_code == 200:
-            with open(thumbnail_path, "wb") as f:
-                f.write(response.content)
+        miniatura = None
+        sesion = obtener_sesion()
+        with span("thumbnail", video_id=self.video_id) as medicion:
+            for resolucion in RESOLUCIONES_MINIATURA:
+                cabeceras = {}
+                if resolucion == anterior.get("resolucion"):
+                    if anterior.get("etag"):
+                        cabeceras["If-None-Match"] = anterior["etag"]
+                    if anterior.get("last_modified"):
+                        cabeceras["If-Modified-Since"] = anterior["last_modified"]
+
+                url = URL_MINIATURA.format(video_id=self.video_id, resolucion=resolucion)
+                with sesion.get(url, headers=cabeceras, stream=True, timeout=TIMEOUT_S) as response:
+                    if response.status_code == 304:
+                        miniatura = anterior
+                        medicion.anotar(resolucion=resolucion, sin_cambios=True)
+                        print(f"La miniatura no ha cambiado: {thumbnail_path}")
+                        break
+                    # YouTube responde 404 cuando no existe la miniatura en esa resolución
+                    if response.status_code == 404:
+                        continue
+                    response.raise_for_status()
+
+                    ruta_temporal = f"{thumbnail_path}.tmp"
+                    with open(ruta_temporal, "wb") as f:
+                        for bloque in response.iter_content(64 * 1024):
+                            f.write(bloque)
+                            medicion.sumar(bytes=len(bloque))
+                    os.replace(ruta_temporal, thumbnail_path)
+                    miniatura = {
+                        "resolucion": resolucion,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+                    medicion.anotar(resolucion=resolucion)
+                    print(f"Miniatura descargada ({resolucion}): {thumbnail_path}")
+                    break
+
+        if miniatura is not None:
             self.path_thumbnail = thumbnail_path
-            print(f"Miniatura descargada: {thumbnail_path}")
         else:
-            print("No se pudo descargar la miniatura: enlace no válido.")
+            print("No se pudo descargar la miniatura: no existe en ninguna resolución.")
 
-        # Actualizar el registro y guardar
-        if self.video_id not in self.registro_videos:
-            self.registro_videos[self.video_id] = {}
-        self.registro_videos[self.video_id]["path_thumbnail"] = self.path_thumbnail
-        self.guardar_registro()
+        # Actualizar el registro
+        self.actualizar_registro("thumbnail", path_thumbnail=self.path_thumbnail, miniatura=miniatura)
 
 
 
-    def generara_resumen_video(self, formato="Markdown", idioma="Castellano", MODEL='gpt-4-turbo'):
+    def resumir_por_fragmentos(self, texto, idioma="Castellano", MODEL='gpt-4-turbo', max_tokens=TOKENS_POR_FRAGMENTO, forzar=False):
         """
-        Genera un resumen del video en formato Markdown.
+        Reduce un texto largo resumiendo sus fragmentos en paralelo (fase map) hasta que el
+        conjunto de resúmenes quepa en un solo prompt. Con `forzar=True` se hace al menos una pasada
+        aunque el texto ya quepa. Los resúmenes parciales quedan en la caché de respuestas.
+        """
+        system_prompt = f"""
+            You will receive part {{parte}} of {{total}} of the transcription of a video.
+            Summarize it in `{idioma}`, keeping every key point, fact, name and figure in the order they appear.
+            Do not add introductions or conclusions: the partial summaries will be combined later.
         """
-        path=self.transcription_path
-        # Lee el contenido del archivo de texto
-        with open(self.transcription_path, 'r', encoding='utf-8') as file:
-            prompt = file.read()
 
-        # Extraemos el nombre del video (sin extensión)
+        async def resumir(fragmentos):
+            return await asyncio.gather(*[
+                get_response_from_openai_async(
+                    system_prompt=system_prompt.format(parte=i + 1, total=len(fragmentos)),
+                    prompt=fragmento,
+                    MODEL=MODEL,
+                )
+                for i, fragmento in enumerate(fragmentos)
+            ])
+
+        while forzar or estimar_tokens(texto) > max_tokens:
+            forzar = False
+            fragmentos = dividir_por_tokens(texto, max_tokens)
+            print(f"Resumiendo la transcripción en {len(fragmentos)} fragmentos en paralelo...")
+            resumenes = ejecutar_async(resumir(fragmentos))
+            texto = "\n\n".join(f"Parte {i + 1}:\n{resumen}" for i, resumen in enumerate(resumenes))
+        return texto
+
+    def _ruta_artefacto(self, tipo, formato):
+        """
+        Ruta del archivo de un artefacto: `<tipo>_<video>/<tipo>_<video>.<ext>` junto a la transcripción.
+        """
         nombre_video = os.path.basename(self.transcription_path).replace('.txt', '')
-        directorio_base = os.path.dirname(path)
-
-        
-        # Creamos el sistema de prompt para generar un resumen de video
-        system_prompt=f"""
-            Generate a summary from the transcription of a video, including a detailed introduction, explanation of key points, and a final conclusion. 
-
-            Use the following guidelines for the summary:
-
-            - Write in the specified language `{idioma}`.
-            - Maintain a formal tone throughout the text.
-            - Begin with a compelling introduction that presents the topic of the video and encourages the reader to continue reading.
-            - Clearly explain the key points, detailing significant information in an organized and comprehensible manner.
-            - Conclude with a final summary that succinctly encapsulates the key points to leave the audience with a clear understanding of the main message.
-
-            # Output Format
-
-            The summary should have the following structure:
-
-            - **Introduction:** A brief introduction presenting the theme of the video.
-            - **Detailed explanation of key points:** A detailed yet concise discussion of the primary elements of the video.
-            - **Conclusion:** A succinct summary that ties together the main arguments or points of the video.
-
-            The output should be consistent with the following parameters:
-            - Replace `{idioma}` with the correct language (e.g., Spanish, English).
-            - Replace `{formato}` with the suitable format (e.g., plaintext, HTML).
-
-            # Examples
-
-            Input: (Fragment of the transcribed video)
-            "Hoy les traigo una lista de consejos imprescindibles para mejorar la productividad..."
-
-            Output: 
-
-            **Introducción:** En la actualidad, ser productivo se ha vuelto un desafío importante debido a la cantidad de distracciones y el ritmo acelerado del día a día. A continuación, os presento algunos de los mejores consejos para mejorar nuestra productividad.
-
-            **Puntos clave detallados:**
-            1. **Define metas claras:** Es esencial establecer objetivos que sean alcanzables y específicos.
-            2. **Elimina distracciones:** Identifica las fuentes de distracción y toma medidas para reducirlas.
-            3. **Administra tu tiempo adecuadamente:** Utiliza técnicas como la del Pomodoro para dividir tu trabajo en intervalos manejables.
-
-            **Conclusión:** Estos consejos son fundamentales para ayudarte a mejorar tu productividad en el trabajo y en la vida diaria. Pon en práctica estas recomendaciones y notarás una diferencia significativa. Si quieres saber más, no dudes en ver nuestro video completo.
-
-            # Notes
-
-            - Ensure that the explanation of key points balances between detail and brevity.
-            - Adapt tone and language to suit the given `{idioma}` and required `{formato}` to ensure consistency.
+        carpeta = os.path.join(os.path.dirname(self.transcription_path), f'{tipo}_{nombre_video}')
+        os.makedirs(carpeta, exist_ok=True)
+        extension = EXTENSIONES_FORMATO.get(formato.lower(), ".txt")
+        return os.path.join(carpeta, f'{tipo}_{nombre_video}{extension}')
 
+    def generar_artefactos(self, artefactos=None, idioma="Castellano", MODEL='gpt-4-turbo', por_fragmentos=None):
         """
+        Genera a la vez varios artefactos (resumen, artículo...) en distintos formatos a partir de
+        una sola lectura de la transcripción. `artefactos` es una lista de tuplas (tipo, formato).
+        Si la transcripción es larga se resume primero por fragmentos, una vez para todos.
+        Cada respuesta se escribe en su archivo en streaming según llegan los tokens.
+        Devuelve un diccionario {(tipo, formato): ruta}.
+        """
+        artefactos = [(tipo, formato.lower()) for tipo, formato in artefactos or ARTEFACTOS_POR_DEFECTO]
 
-        response =get_response_from_openai(system_prompt=system_prompt,prompt=prompt)
-
-        articulo = response
-
-        # Determinar la extensión según el formato
-        if formato.lower() == "markdown":
-            extension = ".md"
-        elif formato.lower() == "html":
-            extension = ".html"
-        else:
-            extension = ".txt"  # Por defecto, si es un formato no especificado
-
-        # Crear el nombre del archivo para el artículo de blog
-        carpeta_resumen = os.path.join(directorio_base, 'resumen_' + nombre_video)
-        if not os.path.exists(carpeta_resumen):
-            os.makedirs(carpeta_resumen)
-
-        ruta_resumen = os.path.join(carpeta_resumen, f'resumen_{nombre_video}{extension}')
-
-        # Guardar el artículo en el formato correspondiente
-        with open(ruta_resumen, 'w', encoding='utf-8') as resumen_file:
-            resumen_file.write(articulo)
-
-        print(f"Artículo optimizado para SEO guardado en: {ruta_resumen}")
-        return ruta_resumen
-
-
-    def generar_articulo_blog(self, formato="Markdown", idioma="Castellano", MODEL='gpt-4-turbo'):
-        path=self.transcription_path
         # Lee el contenido del archivo de texto
-        with open(path, 'r', encoding='utf-8') as file:
+        with open(self.transcription_path, 'r', encoding='utf-8') as file:
             prompt = file.read()
 
-        # Extraemos el nombre del video (sin extensión)
-        nombre_video = os.path.basename(path).replace('.txt', '')
-        directorio_base = os.path.dirname(path)
-        
-        # Creamos el sistema de prompt para generar un artículo de blog optimizado para SEO
-        prompt_system = f"""
-        Eres un experto en redacción de artículos de blog optimizados para SEO. 
-        A partir del texto proporcionado, que es una transcripción de uno de mis  videos, 
-        debes generar un artículo para mi blog y esté optimizado para motores de búsqueda en tono formal y en primera persona 
-        para poder generar tráfico de mi blog hacia el vídeo.
-        
-        **Instrucciones detalladas:**
-        - Comienza con una introducción que presente el tema del video y atraiga la atención del lector.
-        - Usa subtítulos H2 y H3 para estructurar el contenido y hacerlo escaneable.
-        - Incluye una lista de palabras clave relevantes relacionadas con el tema del video.
-        - Asegúrate de que cada sección esté bien desarrollada y que las palabras clave estén distribuidas naturalmente a lo largo del artículo.
-        - Usa párrafos cortos y sencillos para mejorar la legibilidad.
-        - Incluye una conclusión clara que resuma los puntos clave del artículo.
-        - Optimiza para SEO usando llamadas a la acción (CTA) relevantes, como "Descubre más", "Visita nuestra página", etc.
-        
-        El resultado debe estar en formato {formato} y en el idioma {idioma}.
-        """
-        
-        
-        # Generar el artículo usando el modelo GPT
-        response =get_response_from_openai(system_prompt=prompt_system,prompt=prompt)
-
-        articulo = response
-
-        # Determinar la extensión según el formato
-        if formato.lower() == "markdown":
-            extension = ".md"
-        elif formato.lower() == "html":
-            extension = ".html"
-        else:
-            extension = ".txt"  # Por defecto, si es un formato no especificado
-
-        # Crear el nombre del archivo para el artículo de blog
-        carpeta_articulo = os.path.join(directorio_base, 'articulo_' + nombre_video)
-        if not os.path.exists(carpeta_articulo):
-            os.makedirs(carpeta_articulo)
-
-        ruta_articulo = os.path.join(carpeta_articulo, f'articulo_{nombre_video}{extension}')
+        if por_fragmentos or (por_fragmentos is None and estimar_tokens(prompt) > TOKENS_POR_FRAGMENTO):
+            prompt = self.resumir_por_fragmentos(prompt, idioma=idioma, MODEL=MODEL, forzar=bool(por_fragmentos))
+
+        # Varios artefactos pueden ir al mismo archivo ("markdown" y "md", o dos formatos sin
+        # extensión propia): se genera una vez por archivo y se registra para todos
+        rutas = {(tipo, formato): self._ruta_artefacto(tipo, formato) for tipo, formato in artefactos}
+        por_ruta = {}
+        for artefacto, ruta in rutas.items():
+            por_ruta.setdefault(ruta, artefacto)
+        unicos = list(por_ruta.values())
+
+        async def generar():
+            return await asyncio.gather(*[
+                stream_response_from_openai_async(
+                    system_prompt=TIPOS_ARTEFACTO[tipo]["prompt"](idioma=idioma, formato=formato),
+                    prompt=prompt,
+                    destino=rutas[(tipo, formato)],
+                    MODEL=MODEL,
+                )
+                for tipo, formato in unicos
+            ], return_exceptions=True)
+
+        print(f"Generando {len(unicos)} artefactos en paralelo: {', '.join(f'{tipo} ({formato})' for tipo, formato in unicos)}")
+        resultados = ejecutar_async(generar())
+
+        # Se registran los que han terminado aunque alguno haya fallado
+        errores = []
+        fallidas = set()
+        for (tipo, formato), resultado in zip(unicos, resultados):
+            if isinstance(resultado, BaseException):
+                print(f"Error generando {tipo} ({formato}): {resultado}")
+                errores.append(resultado)
+                fallidas.add(rutas[(tipo, formato)])
+                continue
+            print(f"{tipo.capitalize()} ({formato}) guardado en: {rutas[(tipo, formato)]}")
+        generados = {artefacto: ruta for artefacto, ruta in rutas.items() if ruta not in fallidas}
+
+        if generados:
+            # Todas las rutas van en `artefactos`; path_resumen y path_articulo guardan la primera de su tipo
+            nuevos = {}
+            campos = {}
+            for (tipo, formato), ruta in generados.items():
+                nuevos[f"{tipo}.{formato}"] = ruta
+                campos.setdefault(TIPOS_ARTEFACTO[tipo]["campo"], ruta)
+            tipos = {tipo for tipo, _ in generados}
+            estado = tipos.pop() if len(tipos) == 1 else "artefactos"
+            self.registro.registrar_artefactos(self.video_id, nuevos, url=self.url, estado=estado, **campos)
+
+        if errores:
+            raise errores[0]
+        return generados
+
+    def generara_resumen_video(self, formato="markdown", idioma="Castellano", MODEL='gpt-4-turbo', por_fragmentos=None):
+        """
+        Genera un resumen del video en formato Markdown.
+        Si la transcripción supera TOKENS_POR_FRAGMENTO (o `por_fragmentos` es True) se resume
+        primero por partes en paralelo y el resumen final se hace sobre esos resúmenes parciales.
+        """
+        return self.generar_artefactos([("resumen", formato)], idioma=idioma, MODEL=MODEL, por_fragmentos=por_fragmentos)[("resumen", formato.lower())]
 
-        # Guardar el artículo en el formato correspondiente
-        with open(ruta_articulo, 'w', encoding='utf-8') as articulo_file:
-            articulo_file.write(articulo)
 
-        print(f"Artículo optimizado para SEO guardado en: {ruta_articulo}")
-        return ruta_articulo
\ No newline at end of file
+    def generar_articulo_blog(self, formato="markdown", idioma="Castellano", MODEL='gpt-4-turbo'):
+        return self.generar_artefactos([("articulo", formato)], idioma=idioma, MODEL=MODEL)[("articulo", formato.lower())]
@@ -1,22 +1,198 @@
 import argparse
-from classes.YouTube import YouTube
+import json
+import sys
+import time
+import Gpt
+import Metricas
+from Metricas import span
+from classes.Registro import Registro
+from classes.Indice import IndiceBusqueda, RESULTADOS_POR_DEFECTO
+from classes.YouTube import YouTube, extraer_id_de_url, parsear_artefactos, MAX_CONCURRENCIA_TRANSCRIPCION, IDIOMAS_SUBTITULOS, ARTEFACTOS_POR_DEFECTO
+from classes.Pipeline import Pipeline, etapas_por_defecto, expandir_urls, leer_urls, TAM_COLA, WORKERS_POR_ETAPA
+from classes.Servicio import Servicio, HOST_SERVICIO, PUERTO_SERVICIO
 
 def main():
     # Configuración de los argumentos de línea de comandos
     parser = argparse.ArgumentParser(description="Descargar y transcribir videos de YouTube.")
-    parser.add_argument("--url", type=str, required=True, help="URL del video de YouTube")
+    origen = parser.add_mutually_exclusive_group()
+    origen.add_argument("--url", type=str, help="URL del video, playlist o canal de YouTube")
+    origen.add_argument("--archivo", type=str, help="Archivo con una URL por línea")
+    parser.add_argument("--concurrencia", type=int, default=MAX_CONCURRENCIA_TRANSCRIPCION, help="Número de segmentos de audio que se transcriben a la vez")
+    parser.add_argument("--solo-audio", action="store_true", help="Descargar solo el audio, sin el video")
+    parser.add_argument("--workers", type=int, default=WORKERS_POR_ETAPA, help="Hilos por etapa en el modo por lotes")
+    parser.add_argument("--cola", type=int, default=TAM_COLA, help="Tamaño de las colas entre etapas en el modo por lotes")
+    parser.add_argument("--idiomas-subtitulos", type=str, default=",".join(IDIOMAS_SUBTITULOS), help="Idiomas de subtítulos a probar, por orden, separados por comas")
+    parser.add_argument("--artefactos", type=str, default=",".join(f"{tipo}:{formato}" for tipo, formato in ARTEFACTOS_POR_DEFECTO), help="Artefactos a generar a la vez, como tipo:formato separados por comas (p. ej. resumen:markdown,articulo:html)")
+    parser.add_argument("--sin-cache", action="store_true", help="No usar la caché de respuestas de OpenAI")
+    parser.add_argument("--profile", nargs="?", const="profile.jsonl", metavar="RUTA", help="Guardar las métricas de cada etapa en RUTA (JSON Lines) y mostrar un resumen al terminar")
+
+    # Consultas que solo leen el registro: no descargan nada ni necesitan la API Key
+    comandos = parser.add_subparsers(dest="comando", metavar="{status,list,search,serve}")
+    status = comandos.add_parser("status", help="Mostrar lo registrado de un video")
+    status.add_argument("video", type=str, help="ID o URL del video")
+    status.add_argument("--json", action="store_true", help="Mostrar la entrada en JSON")
+    listado = comandos.add_parser("list", help="Listar los videos del registro")
+    listado.add_argument("--estado", type=str, help="Mostrar solo los videos en este estado (mp3, video, transcripcion, resumen...)")
+    listado.add_argument("--json", action="store_true", help="Mostrar las entradas en JSON")
+    busqueda = comandos.add_parser("search", help="Buscar en las transcripciones")
+    busqueda.add_argument("consulta", type=str, help="Palabras a buscar")
+    busqueda.add_argument("--limite", type=int, default=RESULTADOS_POR_DEFECTO, help="Número máximo de resultados")
+    busqueda.add_argument("--fts", action="store_true", help="Pasar la consulta tal cual a SQLite FTS5 (OR, NEAR, prefijo*...)")
+    busqueda.add_argument("--reindexar", action="store_true", help="Indexar antes las transcripciones del registro que falten o hayan cambiado")
+    busqueda.add_argument("--json", action="store_true", help="Mostrar los resultados en JSON")
+
+    # Servicio de larga duración que recibe videos por HTTP (las opciones generales van antes de `serve`)
+    servicio = comandos.add_parser("serve", help="Arrancar el servicio que recibe videos por HTTP")
+    servicio.add_argument("--host", type=str, default=HOST_SERVICIO, help="Dirección en la que escuchar")
+    servicio.add_argument("--puerto", type=int, default=PUERTO_SERVICIO, help="Puerto en el que escuchar")
     args = parser.parse_args()
 
+    if args.comando == "status":
+        sys.exit(mostrar_estado(args.video, args.json))
+    if args.comando == "list":
+        listar_videos(args.estado, args.json)
+        return
+    if args.comando == "search":
+        buscar(args)
+        return
+    if args.comando != "serve" and not args.url and not args.archivo:
+        parser.error("hay que indicar --url, --archivo o un comando (status, list, search, serve)")
+
+    try:
+        args.artefactos = parsear_artefactos(args.artefactos)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.sin_cache:
+        Gpt.CACHE_ACTIVA = False
+
+    if args.profile:
+        Metricas.activar(args.profile)
+    try:
+        if args.comando == "serve":
+            servir(args)
+        else:
+            procesar(args)
+    finally:
+        if args.profile:
+            print(f"Métricas guardadas en {args.profile}")
+            Metricas.imprimir_resumen()
+            Metricas.desactivar()
+
+def _registro_lectura():
+    """
+    Abre el registro sin escribir en él; si no existe, termina con un error.
+    """
+    try:
+        return Registro(solo_lectura=True)
+    except FileNotFoundError as e:
+        sys.exit(f"{e}. Ejecuta el comando desde el directorio en el que se procesan los videos.")
+
+def mostrar_estado(video, como_json=False):
+    """
+    Imprime la entrada del registro de un video. Devuelve 1 si no está registrado.
+    """
+    video_id = extraer_id_de_url(video) or video
+    info = _registro_lectura().obtener(video_id)
+    if info is None:
+        print(f"El video {video_id} no está en el registro.")
+        return 1
+    if como_json:
+        print(json.dumps(info, ensure_ascii=False, indent=2))
+        return 0
+    for clave, valor in info.items():
+        if clave == "actualizado" and valor:
+            valor = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(valor))
+        if valor is not None:
+            print(f"{clave:<22}{valor}")
+    return 0
+
+def listar_videos(estado=None, como_json=False):
+    """
+    Imprime los videos del registro, del más reciente al más antiguo.
+    """
+    videos = _registro_lectura().listar(estado)
+    if como_json:
+        print(json.dumps(videos, ensure_ascii=False, indent=2))
+        return
+    print(f"{'Video':<13}{'Estado':<15}{'Actualizado':<18}Título")
+    for info in videos:
+        actualizado = time.strftime("%Y-%m-%d %H:%M", time.localtime(info["actualizado"])) if info.get("actualizado") else ""
+        print(f"{info['video_id']:<13}{info.get('estado') or '':<15}{actualizado:<18}{info.get('titulo') or ''}")
+    print(f"{len(videos)} videos")
+
+def _marca_tiempo(segundos):
+    segundos = int(segundos)
+    horas, segundos = divmod(segundos, 3600)
+    minutos, segundos = divmod(segundos, 60)
+    return f"{horas}:{minutos:02d}:{segundos:02d}" if horas else f"{minutos}:{segundos:02d}"
+
+def buscar(args):
+    """
+    Imprime los segmentos de transcripción que coinciden con la consulta, los más relevantes primero.
+    """
+    indice = IndiceBusqueda()
+    if args.reindexar:
+        print(f"Transcripciones indexadas: {indice.actualizar_desde_registro(_registro_lectura())}")
+    try:
+        resultados = indice.buscar(args.consulta, limite=args.limite, literal=not args.fts)
+    except ValueError as e:
+        sys.exit(str(e))
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+        return
+    for resultado in resultados:
+        url = f"https://www.youtube.com/watch?v={resultado['video_id']}"
+        if resultado["inicio"] is not None:
+            print(f"[{_marca_tiempo(resultado['inicio'])}] {resultado['titulo'] or resultado['video_id']}  {url}&t={int(resultado['inicio'])}s")
+        else:
+            print(f"{resultado['titulo'] or resultado['video_id']}  {url}")
+        print(f"    {resultado['fragmento']}")
+    print(f"{len(resultados)} resultados")
+
+def _idiomas_subtitulos(args):
+    return [idioma.strip() for idioma in args.idiomas_subtitulos.split(",") if idioma.strip()]
+
+def servir(args):
+    Servicio(
+        etapas=etapas_por_defecto(solo_audio=args.solo_audio, workers=args.workers, artefactos=args.artefactos),
+        tam_cola=args.cola,
+        max_concurrencia=args.concurrencia,
+        idiomas_subtitulos=_idiomas_subtitulos(args),
+    ).servir(args.host, args.puerto)
+
+def procesar(args):
+    idiomas_subtitulos = _idiomas_subtitulos(args)
+
+    if args.archivo:
+        urls = [url for linea in leer_urls(args.archivo) for url in expandir_urls(linea)]
+    else:
+        urls = expandir_urls(args.url)
+
+    # Varios videos: se procesan en pipeline, con las etapas solapadas entre videos
+    if len(urls) != 1:
+        print(f"Procesando {len(urls)} videos en modo por lotes.")
+        pipeline = Pipeline(
+            etapas=etapas_por_defecto(solo_audio=args.solo_audio, workers=args.workers, artefactos=args.artefactos),
+            tam_cola=args.cola,
+            max_concurrencia=args.concurrencia,
+            idiomas_subtitulos=idiomas_subtitulos,
+        )
+        pipeline.procesar(urls)
+        return
+
     # Crear instancia de YouTube con la URL proporcionada
-    yt = YouTube(url=args.url)
-    yt.descargar_mp3()
-    yt.descargar_video()
-    yt.transcribir_audio()
-    yt.descargar_thumbnail()
-    # resultado=yt.generar_articulo_blog()
-    # print(f"El artículo generado es:\n{resultado}")
-    resultado=yt.generara_resumen_video()
-    print(f"El artículo generado es:\n{resultado}")
+    yt = YouTube(url=urls[0], max_concurrencia=args.concurrencia, idiomas_subtitulos=idiomas_subtitulos)
+    with span("etapa.descarga", video_id=yt.video_id):
+        yt.descargar_medios(solo_audio=args.solo_audio)
+    with span("etapa.transcripcion", video_id=yt.video_id):
+        yt.transcribir_audio()
+    with span("etapa.thumbnail", video_id=yt.video_id):
+        yt.descargar_thumbnail()
+    with span("etapa.artefactos", video_id=yt.video_id):
+        resultado=yt.generar_artefactos(args.artefactos)
+    for (tipo, formato), ruta in resultado.items():
+        print(f"{tipo.capitalize()} ({formato}): {ruta}")
 
 if __name__ == "__main__":
     main()